@@ -1,3 +1,4 @@
+import atexit
 from flask import Flask
 from dotenv import load_dotenv
 
@@ -9,7 +10,16 @@ def create_app():
                 template_folder='../templates')
     app.config['SECRET_KEY'] = 'your-secret-key-here'
     
+    from app.database import close_db_connection, close_pool
+    app.teardown_appcontext(close_db_connection)
+    # Cerrar las conexiones del pool al terminar el proceso
+    atexit.register(close_pool)
+    
     from app.routes import main_bp
     app.register_blueprint(main_bp)
     
+    # Los trabajos en segundo plano de una ejecución anterior ya no van a terminar
+    from app.services import JobService
+    JobService.fail_interrupted()
+    
     return app
\ No newline at end of file
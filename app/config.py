@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,6 +15,65 @@ class Config:
         'password': os.getenv('PG_PASSWORD')
     }
 
+    # Pool de conexiones PostgreSQL: MIN_CONN se abren al iniciar y se conservan
+    # inactivas hasta MAX_CONN para reutilizarlas
+    DB_POOL_MIN_CONN = int(os.getenv('DB_POOL_MIN_CONN', 1))
+    DB_POOL_MAX_CONN = int(os.getenv('DB_POOL_MAX_CONN', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_HEALTH_CHECK = os.getenv('DB_POOL_HEALTH_CHECK', 'true').lower() == 'true'
+    # Segundos de inactividad tras los que una conexión se valida con SELECT 1 al tomarla
+    DB_POOL_IDLE_CHECK = float(os.getenv('DB_POOL_IDLE_CHECK', 30))
+
+    # Segundos que se conserva un CSV validado por check-csv a la espera de import-csv
+    IMPORT_SESSION_TTL = int(os.getenv('IMPORT_SESSION_TTL', 900))
+
+    # Segundos que se conservan las eliminaciones para /api/articles/changes; un
+    # cliente con una versión más antigua debe recargar el listado completo
+    CHANGES_RETENTION = int(os.getenv('CHANGES_RETENTION', 30 * 24 * 60 * 60))
+
+    # Bytes que una exportación Excel se mantiene en memoria antes de pasar a un temporal en disco
+    EXPORT_SPOOL_MAX_SIZE = int(os.getenv('EXPORT_SPOOL_MAX_SIZE', 10 * 1024 * 1024))
+
+    # Cache de exportaciones: antigüedad máxima (segundos) y tamaño total máximo (bytes)
+    EXPORT_CACHE_MAX_AGE = int(os.getenv('EXPORT_CACHE_MAX_AGE', 24 * 60 * 60))
+    EXPORT_CACHE_MAX_SIZE = int(os.getenv('EXPORT_CACHE_MAX_SIZE', 200 * 1024 * 1024))
+
+    # Cache de metadata_columnas: TTL en segundos (también usado como max-age HTTP) y
+    # archivo que columns2db.py toca al recargar la tabla para invalidar el cache
+    METADATA_CACHE_TTL = int(os.getenv('METADATA_CACHE_TTL', 300))
+    METADATA_STAMP_FILE = os.getenv('METADATA_STAMP_FILE', os.path.join(tempfile.gettempdir(), 'mylib-metadata.stamp'))
+
+    # Subida de documentos por partes: tamaño máximo del PDF, de cada parte (bytes)
+    # y segundos que se conserva una subida incompleta para reanudarla
+    DOCUMENT_MAX_SIZE = int(os.getenv('DOCUMENT_MAX_SIZE', 200 * 1024 * 1024))
+    DOCUMENT_CHUNK_SIZE = int(os.getenv('DOCUMENT_CHUNK_SIZE', 4 * 1024 * 1024))
+    DOCUMENT_UPLOAD_TTL = int(os.getenv('DOCUMENT_UPLOAD_TTL', 24 * 60 * 60))
+
+    # Documentos servidos por el servidor web en lugar de Flask: '' (desactivado),
+    # 'x-sendfile' (Apache/lighttpd) o 'x-accel-redirect' (nginx; DOCUMENT_ACCEL_PREFIX
+    # es la location internal que apunta a uploads/)
+    DOCUMENT_SENDFILE = os.getenv('DOCUMENT_SENDFILE', '').lower()
+    DOCUMENT_ACCEL_PREFIX = os.getenv('DOCUMENT_ACCEL_PREFIX', '/protected-uploads/')
+
+    # max-age (segundos) de los documentos guardados por contenido, que nunca cambian
+    DOCUMENT_CACHE_MAX_AGE = int(os.getenv('DOCUMENT_CACHE_MAX_AGE', 365 * 24 * 60 * 60))
+
+    # Trabajos en segundo plano (importaciones y exportaciones): hilos por proceso,
+    # segundos mínimos entre actualizaciones de progreso, segundos que se conservan
+    # los trabajos terminados con su resultado, segundos entre latidos del proceso
+    # que ejecuta los trabajos y segundos sin latidos tras los que un trabajo
+    # (pendiente o en curso) se da por interrumpido
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_PROGRESS_INTERVAL = float(os.getenv('JOB_PROGRESS_INTERVAL', 1))
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 24 * 60 * 60))
+    JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', 15))
+    JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', 60))
+
+    # Eventos de progreso (SSE) de /api/jobs/<id>/events: segundos entre consultas del
+    # estado y duración máxima de cada conexión (EventSource se reconecta solo)
+    JOB_EVENTS_INTERVAL = float(os.getenv('JOB_EVENTS_INTERVAL', 1))
+    JOB_EVENTS_MAX_DURATION = int(os.getenv('JOB_EVENTS_MAX_DURATION', 5 * 60))
+
     HOST = '0.0.0.0'
     PORT = 4350
     DEBUG = True
\ No newline at end of file
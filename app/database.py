@@ -1,46 +1,248 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR, TRANSACTION_STATUS_UNKNOWN
+from flask import g, has_app_context
+
 from app.config import Config
 
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+# Conexiones entregadas: id(conn) -> (pool, semáforo) de donde salieron, para
+# devolverlas al mismo pool aunque close_pool lo haya reemplazado mientras tanto
+_checked_out = {}
+
+# Momento (time.monotonic) en que cada conexión volvió al pool sin errores, por id(conn)
+_last_used = {}
+
+def _current_pool():
+    """Pool y semáforo vigentes, creándolos la primera vez. Se leen juntos bajo el
+    lock porque close_pool puede reemplazarlos desde otro hilo"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            _pool_slots = threading.BoundedSemaphore(Config.DB_POOL_MAX_CONN)
+            _pool = pool.ThreadedConnectionPool(
+                Config.DB_POOL_MIN_CONN,
+                Config.DB_POOL_MAX_CONN,
+                **Config.DATABASE_CONFIG
+            )
+            # putconn cierra cada conexión devuelta si ya hay minconn inactivas: con
+            # minconn = maxconn se conservan todas para reutilizarlas. Se cambia después
+            # de crear el pool para que al iniciar solo abra DB_POOL_MIN_CONN conexiones
+            _pool.minconn = Config.DB_POOL_MAX_CONN
+        return _pool, _pool_slots
+
+def get_pool():
+    """Devuelve el pool de conexiones compartido, creándolo la primera vez"""
+    return _current_pool()[0]
+
+def close_pool():
+    """Cierra todas las conexiones del pool (útil al apagar el servidor)"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = None
+        _pool_slots = None
+        _last_used.clear()
+
+def _is_healthy(conn):
+    if conn.closed or conn.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+        return False
+
+    if not Config.DB_POOL_HEALTH_CHECK:
+        return True
+
+    # Solo se valida con un viaje a la base si la conexión estuvo inactiva (el servidor
+    # o un firewall pudo cerrarla) o si la última vez terminó con error
+    last_used = _last_used.get(id(conn))
+    if last_used is not None and time.monotonic() - last_used < Config.DB_POOL_IDLE_CHECK:
+        return True
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def _put_back(db_pool, conn, discard, last_used=None):
+    """Devuelve la conexión a su pool (registrando last_used para omitir la
+    validación en el próximo uso); si ese pool ya se cerró solo la cierra"""
+    with _pool_lock:
+        if db_pool is not None and db_pool is _pool:
+            db_pool.putconn(conn, close=discard)
+        elif not conn.closed:
+            conn.close()
+        
+        # Una conexión cerrada no deja su entrada: id(conn) se reutiliza en otra
+        if conn.closed or last_used is None:
+            _last_used.pop(id(conn), None)
+        else:
+            _last_used[id(conn)] = last_used
+
+def acquire_connection():
+    """Obtiene una conexión sana del pool, esperando si todas están en uso"""
+    db_pool, slots = _current_pool()
+
+    if not slots.acquire(timeout=Config.DB_POOL_TIMEOUT):
+        raise pool.PoolError('No hay conexiones disponibles en el pool')
+
+    try:
+        # Descartar conexiones caídas (reinicio del servidor, timeouts, etc.)
+        for _ in range(Config.DB_POOL_MAX_CONN + 1):
+            conn = db_pool.getconn()
+            if _is_healthy(conn):
+                with _pool_lock:
+                    _checked_out[id(conn)] = (db_pool, slots)
+                return conn
+            _put_back(db_pool, conn, discard=True)
+
+        raise pool.PoolError('No se pudo obtener una conexión válida')
+    except Exception:
+        slots.release()
+        raise
+
+def release_connection(conn, discard=False):
+    """Devuelve una conexión al pool, cerrándola si quedó inutilizable"""
+    with _pool_lock:
+        db_pool, slots = _checked_out.pop(id(conn), (None, None))
+
+    healthy = True
+    try:
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status != TRANSACTION_STATUS_IDLE:
+                # Quedó una transacción abierta o con error: validarla en el próximo uso
+                healthy = status != TRANSACTION_STATUS_INERROR
+                conn.rollback()
+        discard = discard or bool(conn.closed)
+    except psycopg2.Error:
+        discard = True
+
+    try:
+        last_used = time.monotonic() if healthy and not discard else None
+        _put_back(db_pool, conn, discard, last_used)
+    finally:
+        if slots is not None:
+            slots.release()
+
 def get_db_connection():
-    return psycopg2.connect(**Config.DATABASE_CONFIG)
+    """Conexión del request actual; fuera de Flask devuelve una conexión del pool
+    que debe liberarse con release_connection()"""
+    if not has_app_context():
+        return acquire_connection()
+
+    conn = g.get('db_conn')
+    if conn is not None and conn.closed:
+        release_connection(g.pop('db_conn'), discard=True)
+        conn = None
+
+    if conn is None:
+        conn = g.db_conn = acquire_connection()
+    return conn
+
+def close_db_connection(exception=None):
+    """Libera la conexión del request al terminar el app context"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        release_connection(conn)
+
+@contextmanager
+def db_connection():
+    if has_app_context():
+        yield get_db_connection()
+        return
+
+    conn = acquire_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
 
 class DatabaseManager:
     @staticmethod
     def execute_query(query, params=None, fetch_all=False, fetch_one=False):
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        try:
-            cur.execute(query, params)
-            
-            if fetch_all:
-                result = cur.fetchall()
-            elif fetch_one:
-                result = cur.fetchone()
-            else:
-                result = None
-                
-            conn.commit()
-            return result
-            
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            cur.close()
-            conn.close()
-    
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            try:
+                cur.execute(query, params)
+
+                if fetch_all:
+                    result = cur.fetchall()
+                elif fetch_one:
+                    result = cur.fetchone()
+                else:
+                    result = None
+
+                conn.commit()
+                return result
+
+            except Exception as e:
+                if not conn.closed:
+                    conn.rollback()
+                raise e
+            finally:
+                cur.close()
+
+    @staticmethod
+    def iter_query(query, params=None, chunk_size=2000):
+        """Recorre el resultado con un cursor del lado del servidor (named cursor),
+        trayendo chunk_size filas por viaje en lugar de cargarlo completo en memoria"""
+        with db_connection() as conn:
+            cur = conn.cursor(name=f'iter_{uuid.uuid4().hex}')
+            cur.itersize = chunk_size
+
+            try:
+                cur.execute(query, params)
+                for row in cur:
+                    yield row
+                conn.commit()
+            except BaseException:
+                # Incluye GeneratorExit si el consumidor deja de iterar antes de terminar
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    @staticmethod
+    @contextmanager
+    def transaction():
+        """Ejecuta varias sentencias en una sola transacción y entrega el cursor"""
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            try:
+                yield cur
+                conn.commit()
+            except Exception as e:
+                if not conn.closed:
+                    conn.rollback()
+                raise e
+            finally:
+                cur.close()
+
     @staticmethod
     def execute_many(query, params_list):
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        try:
-            cur.executemany(query, params_list)
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            cur.close()
-            conn.close()
\ No newline at end of file
+        with db_connection() as conn:
+            cur = conn.cursor()
+
+            try:
+                cur.executemany(query, params_list)
+                conn.commit()
+            except Exception as e:
+                if not conn.closed:
+                    conn.rollback()
+                raise e
+            finally:
+                cur.close()
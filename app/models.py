@@ -1,91 +1,414 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from psycopg2.extras import Json, execute_values
+
+from app.config import Config
 from app.database import DatabaseManager
 
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class ChangesExpiredError(Exception):
+    """La versión pedida a /api/articles/changes ya no se puede continuar"""
+    def __init__(self):
+        super().__init__('La versión indicada ya no está disponible; recargue el listado completo')
+
 class Article:
+    # Columnas de articulos en el orden de la tabla (whitelist para proyecciones)
+    COLUMNS = (
+        'id', 'autor', 'nombre_revista', 'quartil_revista', 'anio', 'doi',
+        'titulo_original', 'titulo_espanol', 'base_datos', 'abstract', 'resumen',
+        'keywords_autor', 'keywords_indexed', 'problema_articulo', 'datos_estadisticos',
+        'pregunta_investigacion', 'objetivo_original', 'objetivo_espanol',
+        'objetivo_reescrito', 'justificacion', 'hipotesis', 'tipo_investigacion',
+        'estudios_previos', 'poblacion_muestra_datos', 'recoleccion_datos',
+        'resultados', 'conclusiones', 'discusion', 'trabajos_futuros',
+        'enlace', 'eid', 'seleccionado'
+    )
+    
+    # Columnas de la exportación Excel (mismo orden que ExcelService.HEADERS)
+    EXPORT_COLUMNS = COLUMNS[1:]
+    
+    # Columnas que el cliente puede modificar (whitelist de la actualización parcial)
+    UPDATABLE_COLUMNS = COLUMNS[1:]
+    
+    # Tipos de las columnas que no son texto (casts para las listas VALUES)
+    COLUMN_TYPES = {'id': 'integer', 'anio': 'integer', 'seleccionado': 'boolean'}
+    
+    # Columnas que se llenan al importar desde Scopus (orden de _create_params)
+    CREATE_COLUMNS = (
+        'autor', 'nombre_revista', 'anio', 'doi', 'titulo_original',
+        'base_datos', 'abstract', 'keywords_autor', 'keywords_indexed', 'enlace', 'eid'
+    )
+    
+    # Si pg_trgm está instalada; lo resuelve _has_trigram()
+    _trigram_available = None
+    
+    SORTABLE_COLUMNS = {
+        'id', 'autor', 'nombre_revista', 'quartil_revista', 'anio', 'doi',
+        'titulo_original', 'titulo_espanol', 'base_datos', 'tipo_investigacion', 'seleccionado'
+    }
+    
+    @staticmethod
+    def resolve_fields(fields=None):
+        """Valida una proyección de campos y devuelve (columnas, incluir_documentos).
+        
+        Sin campos se devuelven todas las columnas y los documentos. El id se
+        incluye siempre porque el frontend lo usa como clave.
+        """
+        if not fields:
+            return None, True
+        
+        invalid = [field for field in fields if field not in Article.COLUMNS and field != 'documentos']
+        if invalid:
+            raise ValueError(f'Campos inválidos: {", ".join(invalid)}')
+        
+        columns = [column for column in Article.COLUMNS if column == 'id' or column in fields]
+        return columns, 'documentos' in fields
     
     @staticmethod
-    def get_all():
-        query = 'SELECT * FROM articulos ORDER BY id DESC'
+    def _select_list(columns=None):
+        # Lista explícita en vez de *: articulos también tiene columnas internas (version, actualizado_en)
+        return ', '.join(columns or Article.COLUMNS)
+    
+    @staticmethod
+    def get_all(columns=None):
+        query = f'SELECT {Article._select_list(columns)} FROM articulos ORDER BY id DESC'
         return DatabaseManager.execute_query(query, fetch_all=True)
     
     @staticmethod
-    def get_all_with_documents():
-        """Obtiene todos los artículos con sus documentos de manera optimizada"""
-        # Obtener todos los artículos
-        articles = Article.get_all()
+    def get_all_with_documents(fields=None):
+        """Obtiene todos los artículos con sus documentos en una sola consulta"""
+        columns, include_documents = Article.resolve_fields(fields)
+        select, documents_join = Article._documents_select(columns, include_documents)
         
-        if not articles:
-            return []
+        query = f'SELECT {select} FROM articulos a {documents_join} ORDER BY a.id DESC'
+        rows = DatabaseManager.execute_query(query, fetch_all=True)
         
-        # Obtener todos los documentos de una vez
-        article_ids = [str(article[0]) for article in articles]
-        if article_ids:
-            placeholders = ','.join(['%s'] * len(article_ids))
-            docs_query = f'''
-                SELECT id, articulo_id, nombre_archivo_original, nombre_archivo_traducido 
-                FROM articulo_documentos 
-                WHERE articulo_id IN ({placeholders})
-            '''
-            documents = DatabaseManager.execute_query(docs_query, article_ids, fetch_all=True)
-            
-            # Mapear documentos por artículo
-            docs_by_article = {}
-            for doc in documents:
-                article_id = doc[1]
-                if article_id not in docs_by_article:
-                    docs_by_article[article_id] = []
-                docs_by_article[article_id].append(ArticleDocument.to_dict(doc))
-        else:
-            docs_by_article = {}
+        return [Article.to_dict_with_documents(row, columns) for row in rows]
+    
+    # Documentos de cada artículo (alias a) como arreglo JSON, con las claves de
+    # ArticleDocument.to_dict; json_agg sin GROUP BY siempre devuelve una fila
+    DOCUMENTS_LATERAL = '''
+        LEFT JOIN LATERAL (
+            SELECT coalesce(json_agg(json_build_object(
+                'id', d.id,
+                'articulo_id', d.articulo_id,
+                'nombre_archivo_original', d.nombre_archivo_original,
+                'nombre_archivo_traducido', d.nombre_archivo_traducido
+            ) ORDER BY d.id), '[]'::json) AS documentos
+            FROM articulo_documentos d
+            WHERE d.articulo_id = a.id
+        ) docs ON true
+    '''
+    
+    @staticmethod
+    def _documents_select(columns=None, include_documents=True):
+        """Lista del SELECT (alias a) con los documentos como última columna y el JOIN
+        que los trae; sin documentos la columna es un arreglo vacío y no hay JOIN"""
+        select = ', '.join(f'a.{column}' for column in (columns or Article.COLUMNS))
+        if not include_documents:
+            return f"{select}, '[]'::json AS documentos", ''
+        return f'{select}, docs.documentos', Article.DOCUMENTS_LATERAL
+    
+    @staticmethod
+    def get_all_json(fields=None):
+        """Listado completo ya serializado a JSON por PostgreSQL.
         
-        # Combinar artículos con documentos
-        result = []
-        for article in articles:
-            article_dict = Article.to_dict(article)
-            article_dict['documentos'] = docs_by_article.get(article[0], [])
-            result.append(article_dict)
+        Evita construir un diccionario por fila y volver a recorrerlo con jsonify:
+        el resultado es el mismo arreglo que get_all_with_documents() en una sola
+        cadena lista para enviar.
+        """
+        columns, include_documents = Article.resolve_fields(fields)
+        select, documents_join = Article._documents_select(columns, include_documents)
         
-        return result
+        query = f'''
+            SELECT coalesce(json_agg(t ORDER BY t.id DESC), '[]')::text
+            FROM (SELECT {select} FROM articulos a {documents_join}) t
+        '''
+        return DatabaseManager.execute_query(query, fetch_one=True)[0]
     
     @staticmethod
-    def get_all_for_export():
-        query = '''
-            SELECT autor, nombre_revista, quartil_revista, anio, doi,
-                   titulo_original, titulo_espanol, base_datos, abstract, resumen,
-                   keywords_autor, keywords_indexed, problema_articulo, datos_estadisticos,
-                   pregunta_investigacion, objetivo_original, objetivo_espanol,
-                   objetivo_reescrito, justificacion, hipotesis, tipo_investigacion,
-                   estudios_previos, poblacion_muestra_datos, recoleccion_datos,
-                   resultados, conclusiones, discusion, trabajos_futuros,
-                   enlace, eid, seleccionado
-            FROM articulos ORDER BY id ASC
+    def _contains_pattern(text):
+        """Patrón ILIKE de 'contiene' con los comodines escapados (como includes() del frontend)"""
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f'%{escaped}%'
+    
+    @staticmethod
+    def _build_filters(search=None, seleccionado=None):
+        """Replica en SQL los filtros de filterArticles() del frontend"""
+        conditions = []
+        params = []
+        
+        if search:
+            pattern = Article._contains_pattern(search)
+            conditions.append('(titulo_original ILIKE %s OR titulo_espanol ILIKE %s OR autor ILIKE %s)')
+            params.extend([pattern, pattern, pattern])
+        
+        if seleccionado is True:
+            conditions.append('seleccionado = true')
+        elif seleccionado is False:
+            conditions.append('seleccionado IS NOT TRUE')
+        
+        return conditions, params
+    
+    @staticmethod
+    def get_page(per_page=10, page=None, cursor=None, sort='id', order='asc',
+                 search=None, seleccionado=None, fields=None):
+        """Obtiene una página de artículos (con documentos) y el total filtrado.
+        
+        Con sort='id' se puede paginar por cursor (id del último artículo recibido);
+        en cualquier otro caso se usa page/offset.
+        """
+        if sort not in Article.SORTABLE_COLUMNS:
+            raise ValueError(f'Columna de ordenamiento inválida: {sort}')
+        if order not in ('asc', 'desc'):
+            raise ValueError(f'Orden inválido: {order}')
+        if cursor is not None and sort != 'id':
+            raise ValueError('La paginación por cursor solo está disponible ordenando por id')
+        
+        columns, include_documents = Article.resolve_fields(fields)
+        
+        conditions, params = Article._build_filters(search, seleccionado)
+        
+        count_where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        count_query = f'SELECT COUNT(*) FROM articulos {count_where}'
+        total = DatabaseManager.execute_query(count_query, params, fetch_one=True)[0]
+        
+        page_conditions = list(conditions)
+        page_params = list(params)
+        offset = 0
+        
+        if cursor is not None:
+            page_conditions.append('id > %s' if order == 'asc' else 'id < %s')
+            page_params.append(cursor)
+        elif page is not None:
+            offset = (page - 1) * per_page
+        
+        where = f'WHERE {" AND ".join(page_conditions)}' if page_conditions else ''
+        direction = order.upper()
+        order_by = f'{sort} {direction} NULLS LAST, id {direction}' if sort != 'id' else f'id {direction}'
+        
+        # La página se corta primero y solo sus filas pasan por el JOIN de documentos;
+        # order_by no necesita alias porque docs solo aporta la columna documentos
+        select, documents_join = Article._documents_select(columns, include_documents)
+        query = f'''
+            SELECT {select}
+            FROM (
+                SELECT {Article._select_list()} FROM articulos {where}
+                ORDER BY {order_by} LIMIT %s OFFSET %s
+            ) a
+            {documents_join}
+            ORDER BY {order_by}
         '''
-        return DatabaseManager.execute_query(query, fetch_all=True)
+        rows = DatabaseManager.execute_query(query, page_params + [per_page, offset], fetch_all=True)
+        
+        articles = [Article.to_dict_with_documents(row, columns) for row in rows]
+        next_cursor = rows[-1][0] if sort == 'id' and len(rows) == per_page else None
+        
+        return {
+            'articles': articles,
+            'total': total,
+            'page': page if cursor is None else None,
+            'per_page': per_page,
+            'next_cursor': next_cursor
+        }
+    
+    # tsvector de la búsqueda de texto completo: títulos y keywords pesan más que
+    # abstract/resumen. Debe coincidir exactamente con la expresión del índice
+    # idx_articulos_busqueda (migración 0005) o el planificador no lo usa.
+    SEARCH_VECTOR = '''(
+        setweight(to_tsvector('english', coalesce(titulo_original, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(titulo_espanol, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(keywords_autor, '') || ' ' || coalesce(keywords_indexed, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(abstract, '')), 'C') ||
+        setweight(to_tsvector('spanish', coalesce(resumen, '')), 'C')
+    )'''
+    
+    @staticmethod
+    def search(text, limit=20, fields=None):
+        """Búsqueda de texto completo (español e inglés) ordenada por relevancia.
+        
+        Usa SEARCH_VECTOR (tsvector con índice GIN de expresión) y, para nombres de autor,
+        similitud de trigramas (operador <%, con índice) si pg_trgm está instalada;
+        sin ella, una coincidencia parcial con ILIKE.
+        """
+        columns, include_documents = Article.resolve_fields(fields)
+        select, documents_join = Article._documents_select(columns, include_documents)
+        all_columns = ', '.join(f'a.{column}' for column in Article.COLUMNS)
+        
+        if Article._has_trigram():
+            author_score = 'word_similarity(%(text)s, a.autor) * 0.1'
+            author_match = '%(text)s <%% a.autor'
+        else:
+            author_score = 'CASE WHEN a.autor ILIKE %(author_pattern)s THEN 0.1 ELSE 0 END'
+            author_match = 'a.autor ILIKE %(author_pattern)s'
+        
+        query = f'''
+            SELECT {select}
+            FROM (
+                SELECT {all_columns},
+                       ts_rank({Article.SEARCH_VECTOR}, q.consulta) + {author_score} AS relevancia
+                FROM articulos a,
+                     (SELECT websearch_to_tsquery('english', %(text)s)
+                             || websearch_to_tsquery('spanish', %(text)s) AS consulta) q
+                WHERE {Article.SEARCH_VECTOR} @@ q.consulta OR {author_match}
+                ORDER BY relevancia DESC, a.id
+                LIMIT %(limit)s
+            ) a
+            {documents_join}
+            ORDER BY a.relevancia DESC, a.id
+        '''
+        params = {'text': text, 'author_pattern': Article._contains_pattern(text), 'limit': limit}
+        rows = DatabaseManager.execute_query(query, params, fetch_all=True)
+        
+        return [Article.to_dict_with_documents(row, columns) for row in rows]
+    
+    @staticmethod
+    def _has_trigram():
+        """Si la extensión pg_trgm está instalada (se consulta una vez por proceso)"""
+        if Article._trigram_available is None:
+            query = "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            Article._trigram_available = DatabaseManager.execute_query(query, fetch_one=True)[0]
+        return Article._trigram_available
     
     @staticmethod
     def get_bookmarks():
-        query = 'SELECT * FROM articulos WHERE seleccionado = true ORDER BY id DESC'
+        query = f'SELECT {Article._select_list()} FROM articulos WHERE seleccionado = true ORDER BY id DESC'
         return DatabaseManager.execute_query(query, fetch_all=True)
     
     @staticmethod
-    def get_bookmarks_for_export():
-        query = '''
-            SELECT autor, nombre_revista, quartil_revista, anio, doi,
-                   titulo_original, titulo_espanol, base_datos, abstract, resumen,
-                   keywords_autor, keywords_indexed, problema_articulo, datos_estadisticos,
-                   pregunta_investigacion, objetivo_original, objetivo_espanol,
-                   objetivo_reescrito, justificacion, hipotesis, tipo_investigacion,
-                   estudios_previos, poblacion_muestra_datos, recoleccion_datos,
-                   resultados, conclusiones, discusion, trabajos_futuros,
-                   enlace, eid, seleccionado
-            FROM articulos WHERE seleccionado = true ORDER BY id ASC
-        '''
-        return DatabaseManager.execute_query(query, fetch_all=True)
+    def has_bookmarks():
+        query = 'SELECT EXISTS (SELECT 1 FROM articulos WHERE seleccionado = true)'
+        return DatabaseManager.execute_query(query, fetch_one=True)[0]
+    
+    @staticmethod
+    def iter_for_export(bookmarks_only=False, chunk_size=2000):
+        """Recorre los artículos a exportar (todas las columnas salvo id) por bloques,
+        con un cursor del lado del servidor"""
+        where = 'WHERE seleccionado = true' if bookmarks_only else ''
+        query = f'SELECT {", ".join(Article.EXPORT_COLUMNS)} FROM articulos {where} ORDER BY id ASC'
+        return DatabaseManager.iter_query(query, chunk_size=chunk_size)
     
     @staticmethod
-    def get_by_id(article_id):
-        query = 'SELECT * FROM articulos WHERE id = %s'
+    def count_for_export(bookmarks_only=False):
+        """Cantidad de filas que recorrerá iter_for_export (para informar el progreso)"""
+        where = 'WHERE seleccionado = true' if bookmarks_only else ''
+        return DatabaseManager.execute_query(f'SELECT COUNT(*) FROM articulos {where}', fetch_one=True)[0]
+    
+    @staticmethod
+    def get_by_id(article_id, columns=None):
+        query = f'SELECT {Article._select_list(columns)} FROM articulos WHERE id = %s'
         return DatabaseManager.execute_query(query, (article_id,), fetch_one=True)
     
+    @staticmethod
+    def get_with_documents(article_id, columns=None, include_documents=True):
+        """Artículo como diccionario con sus documentos en una sola consulta (None si no existe)"""
+        select, documents_join = Article._documents_select(columns, include_documents)
+        query = f'SELECT {select} FROM articulos a {documents_join} WHERE a.id = %s'
+        row = DatabaseManager.execute_query(query, (article_id,), fetch_one=True)
+        return Article.to_dict_with_documents(row, columns)
+
+    # xmin de la instantánea: toda transacción anterior ya terminó, así que ningún
+    # cambio con una versión menor puede aparecer después de leerla
+    CHANGE_VERSION_QUERY = '''
+        SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+    '''
+    
+    # Segundos mínimos entre podas del registro de eliminaciones (por proceso)
+    PRUNE_INTERVAL = 60 * 60
+    _last_prune = None
+
+    @staticmethod
+    def get_change_version():
+        """Versión actual de los datos para iniciar la sincronización incremental"""
+        return DatabaseManager.execute_query(Article.CHANGE_VERSION_QUERY, fetch_one=True)[0]
+
+    @staticmethod
+    def get_changes(since):
+        """Artículos insertados, actualizados o eliminados desde la versión since.
+
+        Cada fila guarda el id de la transacción que la modificó y la versión devuelta
+        es el xmin de la instantánea, leído antes que las filas: los cambios de
+        transacciones que seguían abiertas tienen una versión igual o mayor y se
+        entregan en la siguiente consulta. Por eso la comparación es >= y un mismo
+        cambio puede llegar dos veces. Un cambio en los documentos marca al artículo
+        como actualizado. Lanza ChangesExpiredError si since es anterior a las
+        eliminaciones conservadas o no corresponde a esta base de datos.
+        """
+        now = time.monotonic()
+        if Article._last_prune is None or now - Article._last_prune >= Article.PRUNE_INTERVAL:
+            Article._last_prune = now
+            Article.prune_deletions(Config.CHANGES_RETENTION)
+        
+        select, documents_join = Article._documents_select()
+
+        with DatabaseManager.transaction() as cur:
+            cur.execute(Article.CHANGE_VERSION_QUERY)
+            version = cur.fetchone()[0]
+            
+            cur.execute('SELECT version FROM cambios_horizonte')
+            horizon = cur.fetchone()[0]
+            if since < horizon or since > version:
+                raise ChangesExpiredError()
+
+            cur.execute(f'''
+                SELECT {select}, a.version_creacion >= %(since)s AS insertado
+                FROM articulos a
+                {documents_join}
+                WHERE a.version >= %(since)s
+                   OR a.id IN (
+                       SELECT articulo_id FROM articulo_documentos WHERE version >= %(since)s
+                       UNION
+                       SELECT articulo_id FROM registro_eliminaciones
+                       WHERE tabla = 'articulo_documentos' AND version >= %(since)s
+                   )
+                ORDER BY a.id DESC
+            ''', {'since': since})
+            rows = cur.fetchall()
+
+            cur.execute('''
+                SELECT DISTINCT registro_id FROM registro_eliminaciones
+                WHERE tabla = 'articulos' AND version >= %s
+            ''', (since,))
+            deleted = [row[0] for row in cur.fetchall()]
+
+        inserted = [Article.to_dict_with_documents(row[:-1]) for row in rows if row[-1]]
+        updated = [Article.to_dict_with_documents(row[:-1]) for row in rows if not row[-1]]
+
+        return {
+            'since': since,
+            'version': version,
+            'inserted': inserted,
+            'updated': updated,
+            'deleted': deleted
+        }
+    
+    @staticmethod
+    def prune_deletions(max_age):
+        """Borra las eliminaciones registradas hace más de max_age segundos y sube
+        cambios_horizonte por encima de la última borrada"""
+        query = '''
+            WITH podadas AS (
+                DELETE FROM registro_eliminaciones
+                WHERE eliminado_en < now() - make_interval(secs => %s)
+                RETURNING version
+            )
+            UPDATE cambios_horizonte
+            SET version = GREATEST(version, (SELECT max(version) + 1 FROM podadas))
+            WHERE EXISTS (SELECT 1 FROM podadas)
+        '''
+        DatabaseManager.execute_query(query, (max_age,))
+
     @staticmethod
     def update(article_id, data):
         query = '''
@@ -100,7 +423,8 @@ class Article:
                 conclusiones = %s, discusion = %s, trabajos_futuros = %s, enlace = %s,
                 eid = %s, seleccionado = %s
             WHERE id = %s
-        '''
+            RETURNING {columns}
+        '''.format(columns=Article._select_list())
         params = (
             data.get('autor'), data.get('nombre_revista'), data.get('quartil_revista'), 
             data.get('anio'), data.get('doi'), data.get('titulo_original'), data.get('titulo_espanol'),
@@ -113,18 +437,101 @@ class Article:
             data.get('conclusiones'), data.get('discusion'), data.get('trabajos_futuros'),
             data.get('enlace'), data.get('eid'), data.get('seleccionado'), article_id
         )
-        DatabaseManager.execute_query(query, params)
+        return DatabaseManager.execute_query(query, params, fetch_one=True)
     
     @staticmethod
-    def create(data):
-        query = '''
-            INSERT INTO articulos (
-                autor, nombre_revista, anio, doi, titulo_original, 
-                base_datos, abstract, keywords_autor, keywords_indexed, enlace, eid
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        '''
-        params = (
+    def patch(article_id, data):
+        """Actualiza solo las columnas recibidas y devuelve la fila resultante
+        en la misma sentencia (None si el artículo no existe)"""
+        columns = Article._updatable_columns(data)
+        assignments = ', '.join(f'{column} = %s' for column in columns)
+        query = f'UPDATE articulos SET {assignments} WHERE id = %s RETURNING {Article._select_list()}'
+        params = [data[column] for column in columns] + [article_id]
+        return DatabaseManager.execute_query(query, params, fetch_one=True)
+    
+    @staticmethod
+    def _updatable_columns(data):
+        """Columnas de data válidas para actualizar, en el orden de la tabla"""
+        unknown = sorted(set(data) - set(Article.UPDATABLE_COLUMNS))
+        if unknown:
+            raise ValueError(f'Campos no editables: {", ".join(unknown)}')
+        
+        columns = [column for column in Article.UPDATABLE_COLUMNS if column in data]
+        if not columns:
+            raise ValueError('No se enviaron campos para actualizar')
+        return columns
+    
+    @staticmethod
+    def bulk_update(ids=None, changes=None, updates=None):
+        """Aplica varias actualizaciones parciales en una sola transacción.
+        
+        - ids + changes: los mismos valores para todos los artículos (p. ej. marcar
+          o desmarcar seleccionado), en un único UPDATE ... WHERE id = ANY(...).
+        - updates: lista de {'id': ..., campo: valor}; las filas que modifican las
+          mismas columnas se actualizan juntas con UPDATE ... FROM (VALUES ...).
+        
+        Devuelve las filas actualizadas; los ids inexistentes simplemente no aparecen.
+        Un id repetido en updates es un error (no hay un orden claro entre ambas).
+        """
+        select_columns = ', '.join(f'a.{column}' for column in Article.COLUMNS)
+        groups = {}
+        seen_ids = set()
+        
+        for update in updates or []:
+            if not isinstance(update, dict) or not Article._is_id(update.get('id')):
+                raise ValueError('Cada actualización debe ser un objeto con un id entero')
+            if update['id'] in seen_ids:
+                raise ValueError(f'El artículo {update["id"]} aparece más de una vez en updates')
+            seen_ids.add(update['id'])
+            
+            values = {key: value for key, value in update.items() if key != 'id'}
+            columns = tuple(Article._updatable_columns(values))
+            groups.setdefault(columns, []).append([update['id']] + [values[column] for column in columns])
+        
+        if ids:
+            if not all(Article._is_id(article_id) for article_id in ids):
+                raise ValueError('ids debe ser una lista de enteros')
+            changes = changes or {}
+            if not isinstance(changes, dict):
+                raise ValueError('changes debe ser un objeto con los campos a actualizar')
+            changes_columns = Article._updatable_columns(changes)
+        
+        rows = []
+        with DatabaseManager.transaction() as cur:
+            if ids:
+                assignments = ', '.join(f'{column} = %s' for column in changes_columns)
+                cur.execute(
+                    f'UPDATE articulos a SET {assignments} WHERE a.id = ANY(%s) RETURNING {select_columns}',
+                    [changes[column] for column in changes_columns] + [list(ids)]
+                )
+                rows.extend(cur.fetchall())
+            
+            for columns, params_list in groups.items():
+                value_columns = ('id',) + columns
+                assignments = ', '.join(f'{column} = v.{column}' for column in columns)
+                casts = ', '.join(
+                    f'%s::{Article.COLUMN_TYPES[column]}' if column in Article.COLUMN_TYPES else '%s'
+                    for column in value_columns
+                )
+                query = f'''
+                    UPDATE articulos a SET {assignments}
+                    FROM (VALUES %s) AS v({', '.join(value_columns)})
+                    WHERE a.id = v.id
+                    RETURNING {select_columns}
+                '''
+                rows.extend(execute_values(cur, query, params_list, template=f'({casts})', fetch=True))
+        
+        # Un artículo actualizado por ambas vías queda con su última versión
+        return list({row[0]: row for row in rows}.values())
+    
+    @staticmethod
+    def _is_id(value):
+        """Entero JSON válido como id (bool es subclase de int en Python)"""
+        return isinstance(value, int) and not isinstance(value, bool)
+    
+    @staticmethod
+    def _create_params(data):
+        return (
             data.get('autor', ''),
             data.get('nombre_revista', ''),
             int(data.get('anio', 0)) if data.get('anio') else None,
@@ -137,88 +544,207 @@ class Article:
             data.get('enlace', ''),
             data.get('eid', '')
         )
+    
+    @staticmethod
+    def create(data):
+        query = '''
+            INSERT INTO articulos (
+                autor, nombre_revista, anio, doi, titulo_original, 
+                base_datos, abstract, keywords_autor, keywords_indexed, enlace, eid
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        '''
+        params = Article._create_params(data)
         result = DatabaseManager.execute_query(query, params, fetch_one=True)
         return result[0] if result else None
     
+    # Clave del advisory lock que serializa las importaciones sin force_import
+    IMPORT_LOCK_KEY = 'articulos_import'
+    
+    @staticmethod
+    def bulk_create(articles_data, force_import=False, chunk_size=1000, progress=None):
+        """Inserta artículos en lote dentro de una sola transacción.
+        
+        Cada bloque se inserta con un solo INSERT ... VALUES; sin force_import las
+        filas cuyo DOI ya existe se descartan en la base con un anti-join (ver
+        _bulk_insert_query) y los DOIs repetidos dentro del bloque, aquí. Como todo
+        ocurre en la misma transacción, los bloques siguientes ven lo ya insertado.
+        Si se indica, progress(filas_procesadas) se llama después de cada bloque.
+        
+        Sin force_import, las importaciones se serializan con un advisory lock de
+        transacción: el anti-join no ve las filas aún sin confirmar de otra
+        importación concurrente y ambas insertarían el mismo DOI.
+        
+        Retorna (importados, omitidos, fallidas): omitidos son las filas cuyo DOI ya
+        existía y fallidas la lista de filas con datos inválidos, cada una como
+        {'row': número de fila de datos, 'doi': ..., 'error': ...}.
+        """
+        imported_count = 0
+        skipped_count = 0
+        failed_rows = []
+        processed_count = 0
+        doi_index = Article.CREATE_COLUMNS.index('doi')
+        insert_query = Article._bulk_insert_query(skip_existing=not force_import)
+        
+        with DatabaseManager.transaction() as cur:
+            if not force_import:
+                cur.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', (Article.IMPORT_LOCK_KEY,))
+            
+            for chunk in _chunked(enumerate(articles_data, 1), chunk_size):
+                # (número de fila, parámetros) para poder informar las filas fallidas
+                rows = []
+                for row_number, data in chunk:
+                    try:
+                        rows.append((row_number, Article._create_params(data)))
+                    except (TypeError, ValueError) as e:
+                        failed_rows.append({'row': row_number, 'doi': data.get('doi'), 'error': str(e)})
+                
+                if not force_import:
+                    # DOIs repetidos dentro del mismo bloque (los ya existentes los descarta la base)
+                    seen_dois = set()
+                    new_rows = []
+                    for row_number, params in rows:
+                        doi = (params[doi_index] or '').lower()
+                        if doi and doi in seen_dois:
+                            skipped_count += 1
+                            continue
+                        if doi:
+                            seen_dois.add(doi)
+                        new_rows.append((row_number, params))
+                    rows = new_rows
+                
+                if rows:
+                    inserted, chunk_failures = Article._insert_chunk(cur, insert_query, rows)
+                    imported_count += inserted
+                    failed_rows.extend(chunk_failures)
+                    if not force_import:
+                        skipped_count += len(rows) - inserted - len(chunk_failures)
+                
+                processed_count += len(chunk)
+                if progress:
+                    progress(processed_count)
+        
+        return imported_count, skipped_count, failed_rows
+    
+    @staticmethod
+    def _bulk_insert_query(skip_existing=True):
+        """INSERT para execute_values. Con skip_existing las filas cuyo DOI ya existe
+        (sin distinguir mayúsculas) se descartan en la propia base con un anti-join
+        que usa el índice idx_articulos_doi_lower"""
+        columns = ', '.join(Article.CREATE_COLUMNS)
+        if not skip_existing:
+            return f'INSERT INTO articulos ({columns}) VALUES %s'
+        
+        return f'''
+            INSERT INTO articulos ({columns})
+            SELECT {columns} FROM (VALUES %s) AS nuevos ({columns})
+            WHERE COALESCE(nuevos.doi, '') = '' OR NOT EXISTS (
+                SELECT 1 FROM articulos a
+                WHERE lower(a.doi) = lower(nuevos.doi) AND a.doi <> ''
+            )
+        '''
+    
+    @staticmethod
+    def _insert_chunk(cur, insert_query, rows):
+        """Inserta un bloque de (número de fila, parámetros) y retorna (insertadas,
+        fallidas); si alguna fila es inválida se reintenta fila por fila para omitir
+        solo las filas con error, como hacía la importación original. Se capturan los
+        mismos errores que entonces (cualquier Exception): además de los de la base,
+        psycopg2 rechaza con ValueError, antes de enviarlo, un texto con bytes NUL."""
+        # anio se castea explícitamente: en VALUES una columna con solo NULLs sería text
+        template = '(' + ', '.join('%s::integer' if column == 'anio' else '%s'
+                                   for column in Article.CREATE_COLUMNS) + ')'
+        params_list = [params for _, params in rows]
+        
+        cur.execute('SAVEPOINT bulk_chunk')
+        try:
+            execute_values(cur, insert_query, params_list, template=template, page_size=len(params_list))
+            cur.execute('RELEASE SAVEPOINT bulk_chunk')
+            return cur.rowcount, []
+        except Exception:
+            cur.execute('ROLLBACK TO SAVEPOINT bulk_chunk')
+            cur.execute('RELEASE SAVEPOINT bulk_chunk')
+        
+        doi_index = Article.CREATE_COLUMNS.index('doi')
+        inserted = 0
+        failed_rows = []
+        for row_number, params in rows:
+            cur.execute('SAVEPOINT bulk_row')
+            try:
+                execute_values(cur, insert_query, [params], template=template)
+                inserted += cur.rowcount
+            except Exception as e:
+                cur.execute('ROLLBACK TO SAVEPOINT bulk_row')
+                failed_rows.append({'row': row_number, 'doi': params[doi_index], 'error': str(e).strip()})
+            cur.execute('RELEASE SAVEPOINT bulk_row')
+        return inserted, failed_rows
+    
     @staticmethod
     def check_doi_exists(doi):
-        query = 'SELECT doi, titulo_original FROM articulos WHERE doi = %s'
+        # Los DOI no distinguen mayúsculas; la consulta usa idx_articulos_doi_lower
+        query = '''
+            SELECT doi, titulo_original FROM articulos
+            WHERE lower(doi) = lower(%s) AND doi <> ''
+        '''
         return DatabaseManager.execute_query(query, (doi,), fetch_one=True)
     
     @staticmethod
     def check_multiple_dois(dois):
         if not dois:
             return []
-            
-        format_strings = ','.join(['%s'] * len(dois))
-        query = f'SELECT doi, titulo_original FROM articulos WHERE doi IN ({format_strings})'
-        return DatabaseManager.execute_query(query, dois, fetch_all=True)
+        
+        # Un único parámetro array en lugar de una lista IN (%s, %s, ...) de tamaño variable
+        query = '''
+            SELECT doi, titulo_original FROM articulos
+            WHERE lower(doi) = ANY(%s) AND doi <> ''
+        '''
+        lowered_dois = list({doi.lower() for doi in dois})
+        return DatabaseManager.execute_query(query, (lowered_dois,), fetch_all=True)
     
     @staticmethod
-    def to_dict(row):
+    def to_dict(row, columns=None):
         if not row:
             return None
-            
-        return {
-            'id': row[0],
-            'autor': row[1],
-            'nombre_revista': row[2],
-            'quartil_revista': row[3],
-            'anio': row[4],
-            'doi': row[5],
-            'titulo_original': row[6],
-            'titulo_espanol': row[7],
-            'base_datos': row[8],
-            'abstract': row[9],
-            'resumen': row[10],
-            'keywords_autor': row[11],
-            'keywords_indexed': row[12],
-            'problema_articulo': row[13],
-            'datos_estadisticos': row[14],
-            'pregunta_investigacion': row[15],
-            'objetivo_original': row[16],
-            'objetivo_espanol': row[17],
-            'objetivo_reescrito': row[18],
-            'justificacion': row[19],
-            'hipotesis': row[20],
-            'tipo_investigacion': row[21],
-            'estudios_previos': row[22],
-            'poblacion_muestra_datos': row[23],
-            'recoleccion_datos': row[24],
-            'resultados': row[25],
-            'conclusiones': row[26],
-            'discusion': row[27],
-            'trabajos_futuros': row[28],
-            'enlace': row[29],
-            'eid': row[30],
-            'seleccionado': row[31],
-            'documentos': []  # Lista vacía por defecto para compatibilidad
-        }
+        
+        # Columnas en el orden de la consulta (todas o la proyección solicitada)
+        article_dict = dict(zip(columns or Article.COLUMNS, row))
+        article_dict['documentos'] = []  # Lista vacía por defecto para compatibilidad
+        return article_dict
     
     @staticmethod
-    def to_dict_with_documents(row):
-        """Versión que incluye documentos - solo usar cuando sea necesario"""
+    def to_dict_with_documents(row, columns=None):
+        """Fila con los documentos ya agregados como última columna (ver _documents_select)"""
         if not row:
             return None
-            
-        article_dict = Article.to_dict(row)
-        
-        # Agregar información de documentos
-        documents = ArticleDocument.get_by_article_id(row[0])
-        article_dict['documentos'] = [ArticleDocument.to_dict(doc) for doc in documents] if documents else []
         
+        article_dict = Article.to_dict(row[:-1], columns)
+        article_dict['documentos'] = row[-1]
         return article_dict
 
 class ArticleDocument:
+    """Documentos de cada artículo. Los métodos que reciben cur se ejecutan en esa
+    transacción (ver DocumentBlob.locked); sin cur cada uno confirma por su cuenta."""
     
     @staticmethod
-    def get_by_article_id(article_id):
+    def _execute(query, params, cur=None, fetch_all=False, fetch_one=False):
+        if cur is None:
+            return DatabaseManager.execute_query(query, params, fetch_all=fetch_all, fetch_one=fetch_one)
+        
+        cur.execute(query, params)
+        if fetch_all:
+            return cur.fetchall()
+        if fetch_one:
+            return cur.fetchone()
+        return None
+    
+    @staticmethod
+    def get_by_article_id(article_id, cur=None):
         """Obtiene todos los documentos de un artículo específico"""
         query = 'SELECT id, articulo_id, nombre_archivo_original, nombre_archivo_traducido FROM articulo_documentos WHERE articulo_id = %s'
-        return DatabaseManager.execute_query(query, (article_id,), fetch_all=True)
+        return ArticleDocument._execute(query, (article_id,), cur, fetch_all=True)
     
     @staticmethod
-    def create(article_id, original_filename, translated_filename=None):
+    def create(article_id, original_filename, translated_filename=None, cur=None):
         """Crea un nuevo documento asociado a un artículo"""
         query = '''
             INSERT INTO articulo_documentos (articulo_id, nombre_archivo_original, nombre_archivo_traducido)
@@ -226,7 +752,7 @@ class ArticleDocument:
             RETURNING id
         '''
         params = (article_id, original_filename, translated_filename)
-        result = DatabaseManager.execute_query(query, params, fetch_one=True)
+        result = ArticleDocument._execute(query, params, cur, fetch_one=True)
         return result[0] if result else None
     
     @staticmethod
@@ -236,7 +762,7 @@ class ArticleDocument:
         DatabaseManager.execute_query(query, (document_id,))
     
     @staticmethod
-    def delete_by_article_and_type(article_id, doc_type):
+    def delete_by_article_and_type(article_id, doc_type, cur=None):
         """Elimina documento por artículo y tipo (original o traducido)"""
         if doc_type == 'original':
             query = 'DELETE FROM articulo_documentos WHERE articulo_id = %s AND nombre_archivo_original IS NOT NULL'
@@ -245,17 +771,17 @@ class ArticleDocument:
         else:
             return
         
-        DatabaseManager.execute_query(query, (article_id,))
+        ArticleDocument._execute(query, (article_id,), cur)
     
     @staticmethod
-    def update_translated_filename(article_id, translated_filename):
+    def update_translated_filename(article_id, translated_filename, cur=None):
         """Actualiza el nombre del archivo traducido"""
         query = '''
             UPDATE articulo_documentos 
             SET nombre_archivo_traducido = %s 
             WHERE articulo_id = %s AND nombre_archivo_original IS NOT NULL
         '''
-        DatabaseManager.execute_query(query, (translated_filename, article_id))
+        ArticleDocument._execute(query, (translated_filename, article_id), cur)
     
     @staticmethod
     def to_dict(row):
@@ -270,10 +796,114 @@ class ArticleDocument:
             'nombre_archivo_traducido': row[3]
         }
 
+class DocumentBlob:
+    """Archivos guardados por contenido (documentos_contenido); el trigger de
+    articulo_documentos mantiene el contador de referencias"""
+    
+    @staticmethod
+    def get(content_hash):
+        query = 'SELECT hash, nombre_archivo, tamano, referencias FROM documentos_contenido WHERE hash = %s'
+        return DatabaseManager.execute_query(query, (content_hash,), fetch_one=True)
+    
+    @staticmethod
+    @contextmanager
+    def locked(content_hash):
+        """Transacción con el advisory lock del hash: serializa guardar el archivo en
+        disco con borrarlo en collect_garbage(). Entrega el cursor."""
+        with DatabaseManager.transaction() as cur:
+            cur.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', (content_hash,))
+            yield cur
+    
+    @staticmethod
+    def register(cur, content_hash, filename, size):
+        """Registra el archivo (o renueva su ultimo_uso si ya existía) antes de referenciarlo"""
+        cur.execute('''
+            INSERT INTO documentos_contenido (hash, nombre_archivo, tamano)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (hash) DO UPDATE SET ultimo_uso = now()
+        ''', (content_hash, filename, size))
+    
+    @staticmethod
+    def touch(cur, content_hash):
+        """Renueva ultimo_uso de un archivo ya registrado y devuelve su nombre (None si
+        no está registrado)"""
+        cur.execute(
+            'UPDATE documentos_contenido SET ultimo_uso = now() WHERE hash = %s RETURNING nombre_archivo',
+            (content_hash,)
+        )
+        row = cur.fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def find_unreferenced(grace_seconds):
+        """Hashes sin referencias con más de grace_seconds sin uso"""
+        query = '''
+            SELECT hash FROM documentos_contenido
+            WHERE referencias <= 0 AND ultimo_uso < now() - make_interval(secs => %s)
+        '''
+        rows = DatabaseManager.execute_query(query, (grace_seconds,), fetch_all=True)
+        return [row[0] for row in rows]
+    
+    @staticmethod
+    def delete_unreferenced(cur, content_hash, grace_seconds):
+        """Elimina el registro si sigue sin referencias y devuelve su nombre de archivo
+        (None si entretanto se volvió a usar)"""
+        cur.execute('''
+            DELETE FROM documentos_contenido
+            WHERE hash = %s AND referencias <= 0 AND ultimo_uso < now() - make_interval(secs => %s)
+            RETURNING nombre_archivo
+        ''', (content_hash, grace_seconds))
+        row = cur.fetchone()
+        return row[0] if row else None
+
 class ColumnMetadata:
+    # Cache en memoria: clave -> (valor, expira_en, marca de invalidación al cargar)
+    _cache = {}
+    _cache_lock = threading.Lock()
+    
+    @staticmethod
+    def _invalidation_stamp():
+        try:
+            return os.stat(Config.METADATA_STAMP_FILE).st_mtime_ns
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _cached(key, loader):
+        """Devuelve el valor en cache mientras no venza el TTL ni se haya invalidado.
+        Los valores se comparten entre requests: no modificarlos."""
+        stamp = ColumnMetadata._invalidation_stamp()
+        now = time.monotonic()
+        
+        entry = ColumnMetadata._cache.get(key)
+        if entry and entry[1] > now and entry[2] == stamp:
+            return entry[0]
+        
+        value = loader()
+        with ColumnMetadata._cache_lock:
+            ColumnMetadata._cache[key] = (value, now + Config.METADATA_CACHE_TTL, stamp)
+        return value
+    
+    @staticmethod
+    def invalidate_cache():
+        """Descarta el cache de este proceso y, tocando el archivo de marca, el de
+        cualquier otro proceso (p. ej. el servidor web cuando se ejecuta columns2db.py)"""
+        with ColumnMetadata._cache_lock:
+            ColumnMetadata._cache.clear()
+        
+        with open(Config.METADATA_STAMP_FILE, 'a'):
+            os.utime(Config.METADATA_STAMP_FILE)
     
     @staticmethod
     def get_readonly_fields():
+        return ColumnMetadata._cached('readonly_fields', ColumnMetadata._load_readonly_fields)
+    
+    @staticmethod
+    def get_all_metadata():
+        return ColumnMetadata._cached('all_metadata', ColumnMetadata._load_all_metadata)
+    
+    @staticmethod
+    def _load_readonly_fields():
         query = '''
             SELECT columna, id_from_backup 
             FROM metadata_columnas 
@@ -306,7 +936,7 @@ class ColumnMetadata:
         return readonly_fields
     
     @staticmethod
-    def get_all_metadata():
+    def _load_all_metadata():
         query = '''
             SELECT nro_columna, columna, explicacion, formato, dato_fijo, 
                    idioma_deseado_redactar, id_from_backup, max 
@@ -328,4 +958,139 @@ class ColumnMetadata:
                 'max': row[7]
             })
         
-        return result
\ No newline at end of file
+        return result
+
+class DataVersion:
+    """Contador de cambios por tabla que mantienen los triggers (migrations/0002_version_datos.sql).
+    Cada tabla reparte su contador en ranuras (0008_version_datos_ranuras.sql) y su
+    versión es la suma de todas."""
+    
+    @staticmethod
+    def get(table):
+        query = 'SELECT COALESCE(SUM(version), 0)::bigint FROM version_datos WHERE tabla = %s'
+        return DatabaseManager.execute_query(query, (table,), fetch_one=True)[0]
+    
+    @staticmethod
+    def get_many(tables):
+        """Versiones de varias tablas en una sola consulta, en el orden recibido"""
+        query = 'SELECT tabla, SUM(version)::bigint FROM version_datos WHERE tabla = ANY(%s) GROUP BY tabla'
+        rows = DatabaseManager.execute_query(query, (list(tables),), fetch_all=True)
+        versions = dict(rows)
+        return tuple(versions.get(table, 0) for table in tables)
+
+class Job:
+    """Trabajos en segundo plano (migrations/0007_trabajos.sql); los ejecuta JobService"""
+    COLUMNS = [
+        'id', 'tipo', 'estado', 'parametros', 'procesados', 'total', 'resultado',
+        'archivo_resultado', 'error', 'creado_en', 'iniciado_en', 'actualizado_en', 'finalizado_en'
+    ]
+    
+    # Segundos de ejecución (hasta ahora o hasta que terminó), con el reloj de la base
+    # como iniciado_en y finalizado_en
+    ELAPSED_SELECT = 'EXTRACT(EPOCH FROM COALESCE(finalizado_en, now()) - iniciado_en)::float8'
+    
+    @staticmethod
+    def _select_list():
+        return f"{', '.join(Job.COLUMNS)}, {Job.ELAPSED_SELECT}"
+    
+    @staticmethod
+    def create(job_id, kind, params, total=None):
+        query = f'''
+            INSERT INTO trabajos (id, tipo, parametros, total) VALUES (%s, %s, %s, %s)
+            RETURNING {Job._select_list()}
+        '''
+        return DatabaseManager.execute_query(query, (job_id, kind, Json(params), total), fetch_one=True)
+    
+    @staticmethod
+    def get(job_id):
+        query = f'SELECT {Job._select_list()} FROM trabajos WHERE id = %s'
+        return DatabaseManager.execute_query(query, (job_id,), fetch_one=True)
+    
+    @staticmethod
+    def start(job_id):
+        """Marca el trabajo como en curso; False si otro hilo o proceso ya lo tomó"""
+        query = '''
+            UPDATE trabajos SET estado = 'en_curso', iniciado_en = now(), actualizado_en = now()
+            WHERE id = %s AND estado = 'pendiente'
+            RETURNING id
+        '''
+        return DatabaseManager.execute_query(query, (job_id,), fetch_one=True) is not None
+    
+    @staticmethod
+    def update_progress(job_id, processed, total=None):
+        query = '''
+            UPDATE trabajos SET procesados = %s, total = COALESCE(%s, total), actualizado_en = now()
+            WHERE id = %s AND estado = 'en_curso'
+        '''
+        DatabaseManager.execute_query(query, (processed, total, job_id))
+    
+    @staticmethod
+    def complete(job_id, result, result_file=None):
+        """Marca el trabajo como completado; False si ya no estaba en curso (por
+        ejemplo fail_stale lo dio por interrumpido)"""
+        query = '''
+            UPDATE trabajos SET estado = 'completado', resultado = %s, archivo_resultado = %s,
+                   actualizado_en = now(), finalizado_en = now()
+            WHERE id = %s AND estado = 'en_curso'
+            RETURNING id
+        '''
+        return DatabaseManager.execute_query(query, (Json(result), result_file, job_id), fetch_one=True) is not None
+    
+    @staticmethod
+    def fail(job_id, message):
+        """Marca el error de un trabajo que aún no terminó (un trabajo ya terminado
+        conserva su estado)"""
+        query = '''
+            UPDATE trabajos SET estado = 'error', error = %s, actualizado_en = now(), finalizado_en = now()
+            WHERE id = %s AND estado IN ('pendiente', 'en_curso')
+        '''
+        DatabaseManager.execute_query(query, (message, job_id))
+    
+    @staticmethod
+    def heartbeat(job_ids):
+        """Renueva actualizado_en de los trabajos pendientes o en curso indicados: el
+        proceso que los tiene en su cola sigue vivo"""
+        query = '''
+            UPDATE trabajos SET actualizado_en = now()
+            WHERE id = ANY(%s) AND estado IN ('pendiente', 'en_curso')
+        '''
+        DatabaseManager.execute_query(query, (list(job_ids),))
+    
+    @staticmethod
+    def fail_stale(stale_seconds, job_id=None):
+        """Da por interrumpidos los trabajos pendientes o en curso sin latidos ni
+        avances en stale_seconds (el proceso que los tenía terminó); con job_id, solo
+        ese trabajo. Retorna cuántos se marcaron."""
+        query = '''
+            UPDATE trabajos SET estado = 'error', error = 'El trabajo se interrumpió',
+                   actualizado_en = now(), finalizado_en = now()
+            WHERE estado IN ('pendiente', 'en_curso')
+              AND actualizado_en < now() - make_interval(secs => %s)
+              AND (%s::text IS NULL OR id = %s)
+            RETURNING id
+        '''
+        rows = DatabaseManager.execute_query(query, (stale_seconds, job_id, job_id), fetch_all=True)
+        return len(rows)
+    
+    @staticmethod
+    def purge_finished(max_age_seconds):
+        """Elimina los trabajos terminados hace más de max_age_seconds y retorna sus
+        archivos de resultado para borrarlos del disco"""
+        query = '''
+            DELETE FROM trabajos
+            WHERE finalizado_en < now() - make_interval(secs => %s)
+            RETURNING archivo_resultado
+        '''
+        rows = DatabaseManager.execute_query(query, (max_age_seconds,), fetch_all=True)
+        return [row[0] for row in rows if row[0]]
+    
+    @staticmethod
+    def to_dict(row):
+        if not row:
+            return None
+        
+        job_dict = dict(zip(Job.COLUMNS + ['segundos'], row))
+        for column in ('creado_en', 'iniciado_en', 'actualizado_en', 'finalizado_en'):
+            if job_dict[column] is not None:
+                job_dict[column] = job_dict[column].isoformat()
+        return job_dict
@@ -1,30 +1,177 @@
+import hashlib
 import os
-from flask import Blueprint, render_template, request, jsonify, send_file
-from app.models import Article, ColumnMetadata
-from app.services import CSVService, ExcelService, DocumentService
+from functools import wraps
+from flask import Blueprint, Response, make_response, render_template, request, jsonify, send_file, stream_with_context
+from werkzeug.utils import send_from_directory as werkzeug_send_from_directory
+from app.config import Config
+from app.models import Article, ChangesExpiredError, ColumnMetadata, DataVersion
+from app.services import (CSVService, ExcelService, DocumentService, DocumentUploadService, ExportCacheService,
+                          JobService, OffsetMismatchError)
 
 main_bp = Blueprint('main', __name__)
 
+def _not_modified(etag):
+    """Respuesta 304 si el cliente ya tiene la versión indicada por el ETag"""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+def conditional_on(*tables):
+    """GET condicional validado con la versión de datos de las tablas indicadas.
+    
+    El ETag se calcula antes de ejecutar la vista (URL + versiones), así un
+    If-None-Match vigente responde 304 sin consultar ni serializar los datos.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                versions = DataVersion.get_many(tables)
+            except Exception:
+                # Sin versión disponible se responde normalmente (after_request usa el hash del cuerpo)
+                return view(*args, **kwargs)
+            
+            etag = hashlib.sha1(f'{request.full_path}|{versions}'.encode('utf-8')).hexdigest()
+            not_modified = _not_modified(etag)
+            if not_modified:
+                return not_modified
+            
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                if response.cache_control.max_age is None:
+                    # Revalidar siempre: con 304 el navegador reutiliza su copia
+                    response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+@main_bp.after_request
+def add_content_etag(response):
+    """Respaldo para las lecturas JSON sin ETag: validador por hash del cuerpo"""
+    if (request.method == 'GET' and response.status_code == 200 and not response.is_streamed
+            and response.mimetype == 'application/json' and 'ETag' not in response.headers):
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
 @main_bp.route('/')
 def index():
     return render_template('index.html')
 
+PAGINATION_ARGS = ('page', 'per_page', 'cursor', 'sort', 'order', 'search', 'seleccionado')
+MAX_PER_PAGE = 500
+
+def _parse_fields_arg(args):
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    return fields or None
+
+def _parse_pagination_args(args):
+    try:
+        per_page = int(args.get('per_page', 10))
+        page = int(args['page']) if 'page' in args else None
+        cursor = int(args['cursor']) if args.get('cursor') else None
+    except ValueError:
+        raise ValueError('Parámetros de paginación inválidos')
+    
+    if per_page < 1 or per_page > MAX_PER_PAGE:
+        raise ValueError(f'per_page debe estar entre 1 y {MAX_PER_PAGE}')
+    if page is not None and page < 1:
+        raise ValueError('page debe ser mayor o igual a 1')
+    
+    seleccionado = args.get('seleccionado', '').lower()
+    if seleccionado not in ('', 'true', 'false'):
+        raise ValueError('seleccionado debe ser true o false')
+    
+    return {
+        'per_page': per_page,
+        'page': page if page is not None or cursor is not None else 1,
+        'cursor': cursor,
+        'sort': args.get('sort', 'id'),
+        'order': args.get('order', 'asc').lower(),
+        'search': args.get('search', '').strip() or None,
+        'seleccionado': {'true': True, 'false': False}.get(seleccionado),
+        'fields': _parse_fields_arg(args)
+    }
+
 @main_bp.route('/api/articles', methods=['GET'])
+@conditional_on('articulos', 'articulo_documentos')
 def get_articles():
     try:
-        articles = Article.get_all_with_documents()
-        return jsonify(articles)
+        # Versión leída antes que los datos: punto de partida para /api/articles/changes
+        change_version = Article.get_change_version()
+        
+        # Sin parámetros se mantiene el listado completo
+        if not any(arg in request.args for arg in PAGINATION_ARGS):
+            # JSON generado por PostgreSQL: sin diccionarios por fila ni jsonify
+            articles_json = Article.get_all_json(_parse_fields_arg(request.args))
+            response = Response(articles_json, mimetype='application/json')
+        else:
+            response = jsonify(Article.get_page(**_parse_pagination_args(request.args)))
+        
+        response.headers['X-Changes-Version'] = str(change_version)
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@main_bp.route('/api/articles/changes', methods=['GET'])
+@conditional_on('articulos', 'articulo_documentos')
+def get_article_changes():
+    try:
+        try:
+            since = int(request.args.get('since', ''))
+        except ValueError:
+            raise ValueError('El parámetro since debe ser un número entero')
+        if since < 0:
+            raise ValueError('El parámetro since no puede ser negativo')
+        
+        return jsonify(Article.get_changes(since))
+    except ChangesExpiredError as e:
+        # El cliente recarga el listado completo y sigue desde su X-Changes-Version
+        return jsonify({'error': str(e)}), 410
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@main_bp.route('/api/articles/search', methods=['GET'])
+@conditional_on('articulos', 'articulo_documentos')
+def search_articles():
+    try:
+        text = request.args.get('q', '').strip()
+        if not text:
+            return jsonify({'error': 'El parámetro q es obligatorio'}), 400
+        
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            raise ValueError('limit debe ser un número entero')
+        if limit < 1 or limit > MAX_PER_PAGE:
+            raise ValueError(f'limit debe estar entre 1 y {MAX_PER_PAGE}')
+        
+        articles = Article.search(text, limit, _parse_fields_arg(request.args))
+        return jsonify({'query': text, 'articles': articles})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @main_bp.route('/api/articles/<int:article_id>', methods=['GET'])
+@conditional_on('articulos', 'articulo_documentos')
 def get_article(article_id):
     try:
-        article = Article.get_by_id(article_id)
+        columns, include_documents = Article.resolve_fields(_parse_fields_arg(request.args))
+        article = Article.get_with_documents(article_id, columns, include_documents)
         if not article:
             return jsonify({'error': 'Article not found'}), 404
         
-        return jsonify(Article.to_dict_with_documents(article))
+        return jsonify(article)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -32,10 +179,8 @@ def get_article(article_id):
 def update_article(article_id):
     try:
         data = request.json
-        Article.update(article_id, data)
-        
-        # Obtener el artículo actualizado para devolverlo
-        updated_article = Article.get_by_id(article_id)
+        # UPDATE ... RETURNING: la fila actualizada llega en la misma consulta
+        updated_article = Article.update(article_id, data)
         if updated_article:
             return jsonify(Article.to_dict(updated_article))
         else:
@@ -43,6 +188,44 @@ def update_article(article_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@main_bp.route('/api/articles/<int:article_id>', methods=['PATCH'])
+def patch_article(article_id):
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Se esperaba un objeto JSON con los campos a modificar'}), 400
+        
+        updated_article = Article.patch(article_id, data)
+        if not updated_article:
+            return jsonify({'error': 'Article not found'}), 404
+        
+        return jsonify(Article.to_dict(updated_article))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@main_bp.route('/api/articles/bulk-update', methods=['POST'])
+def bulk_update_articles():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Se esperaba un objeto JSON'}), 400
+        
+        ids = data.get('ids') or []
+        updates = data.get('updates') or []
+        if not isinstance(ids, list) or not isinstance(updates, list):
+            return jsonify({'error': 'ids y updates deben ser listas'}), 400
+        if not ids and not updates:
+            return jsonify({'error': 'No se enviaron artículos para actualizar'}), 400
+        
+        rows = Article.bulk_update(ids, data.get('changes'), updates)
+        return jsonify({'updated': len(rows), 'articles': [Article.to_dict(row) for row in rows]})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @main_bp.route('/api/check-csv', methods=['POST'])
 def check_csv():
     try:
@@ -58,15 +241,20 @@ def check_csv():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Los metadatos salen del cache en memoria de ColumnMetadata: sin conditional_on (que
+# consultaría version_datos en cada request) el ETag lo pone add_content_etag con el
+# hash del cuerpo
 @main_bp.route('/api/field-metadata', methods=['GET'])
 def get_field_metadata():
     try:
         readonly_fields = ColumnMetadata.get_readonly_fields()
         metadata = ColumnMetadata.get_all_metadata()
-        return jsonify({
+        response = jsonify({
             'readonly_fields': readonly_fields,
             'columns': metadata
         })
+        response.cache_control.max_age = Config.METADATA_CACHE_TTL
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -74,61 +262,198 @@ def get_field_metadata():
 def get_column_metadata():
     try:
         metadata = ColumnMetadata.get_all_metadata()
-        return jsonify({'metadata': metadata})
+        response = jsonify({'metadata': metadata})
+        response.cache_control.max_age = Config.METADATA_CACHE_TTL
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _job_accepted(job):
+    """Respuesta 202 para un trabajo encolado; se consulta en /api/jobs/<job_id>"""
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['job_id']}"
+    return response
+
 @main_bp.route('/api/import-csv', methods=['POST'])
 def import_csv():
     try:
+        force_import = request.form.get('force', 'false').lower() == 'true'
+        run_async = request.form.get('async', 'false').lower() == 'true'
+        
+        # Confirmación de un CSV ya validado en check-csv
+        token = request.form.get('token')
+        if token:
+            if run_async:
+                return _job_accepted(JobService.submit_import_csv(token, force_import))
+            
+            result = CSVService.import_csv_session(token, force_import)
+            return jsonify(result)
+        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
         file = request.files['file']
-        force_import = request.form.get('force', 'false').lower() == 'true'
+        if run_async:
+            # El trabajo lee las filas de una sesión en disco, no del request
+            token, _ = CSVService.spool_csv_file(file)
+            return _job_accepted(JobService.submit_import_csv(token, force_import))
         
         result = CSVService.import_csv_file(file, force_import)
         return jsonify(result)
         
+    except FileExistsError as e:
+        # Otra confirmación con el mismo token ya reclamó la sesión
+        return jsonify({'error': str(e)}), 409
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 410
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def _csv_export_response(kind, version, bookmarks_only=False):
+    """Respuesta que envía el CSV a medida que se genera (sin archivos temporales)"""
+    etag = ExportCacheService.etag(kind, version, 'csv')
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    
+    filename = f'{kind}-{ExcelService._get_local_timestamp()}.csv'
+    response = Response(
+        stream_with_context(CSVService.iter_export_csv(bookmarks_only)),
+        mimetype='text/csv; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+    response.set_etag(etag)
+    return response
+
+def _excel_export_response(kind, version, build_export):
+    """Sirve la exportación desde el cache si los datos no cambiaron; si no, la genera"""
+    etag = ExportCacheService.etag(kind, version, 'xlsx')
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    
+    export_path = ExportCacheService.get(kind, version, 'xlsx')
+    if export_path is None:
+        export_file, _ = build_export()
+        with export_file:
+            export_path = ExportCacheService.store(kind, version, 'xlsx', export_file)
+    
+    return send_file(
+        export_path,
+        as_attachment=True,
+        download_name=f'{kind}-{ExcelService._get_local_timestamp()}.xlsx',
+        mimetype=EXCEL_MIMETYPE,
+        etag=etag
+    )
+
 @main_bp.route('/api/export-excel', methods=['GET'])
 def export_excel():
     try:
-        temp_file_path, filename = ExcelService.create_excel_export()
+        if request.args.get('async', 'false').lower() == 'true':
+            return _job_accepted(JobService.submit_export(export_format=request.args.get('format', 'xlsx')))
         
-        return send_file(
-            temp_file_path,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        # La versión se lee antes que los datos: una exportación nunca queda
+        # guardada con una versión más nueva que su contenido
+        version = DataVersion.get('articulos')
+        
+        if request.args.get('format') == 'csv':
+            return _csv_export_response('matriz-analisis', version)
         
+        return _excel_export_response('matriz-analisis', version, ExcelService.create_excel_export)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Error al exportar Excel: {str(e)}'}), 500
 
 @main_bp.route('/api/export-excel-bookmarks', methods=['GET'])
 def export_excel_bookmarks():
     try:
+        version = DataVersion.get('articulos')
+        
         # Verificar si hay artículos marcados antes de crear el archivo
-        bookmarks = Article.get_bookmarks()
-        if not bookmarks:
+        if not Article.has_bookmarks():
             return jsonify({'error': 'No hay artículos marcados como favoritos'}), 404
         
-        temp_file_path, filename = ExcelService.create_excel_export_bookmarks()
+        if request.args.get('async', 'false').lower() == 'true':
+            return _job_accepted(JobService.submit_export(True, request.args.get('format', 'xlsx')))
+        
+        if request.args.get('format') == 'csv':
+            return _csv_export_response('matriz-marcadores', version, bookmarks_only=True)
+        
+        return _excel_export_response('matriz-marcadores', version, ExcelService.create_excel_export_bookmarks)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error al exportar Excel de marcadores: {str(e)}'}), 500
+
+@main_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        response = jsonify(JobService.status(job_id))
+        # El estado cambia sin que cambie la URL: no reutilizar copias
+        response.cache_control.no_store = True
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@main_bp.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    try:
+        # Validar el trabajo antes de abrir el stream para responder 400/404 normales
+        JobService.status(job_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    # Sin stream_with_context: cada consulta del stream toma y devuelve su propia
+    # conexión del pool en lugar de retener una mientras dura el trabajo
+    response = Response(JobService.iter_events(job_id), mimetype='text/event-stream')
+    response.cache_control.no_cache = True
+    # nginx no debe acumular los eventos en su buffer
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@main_bp.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    try:
+        job, result_path = JobService.get_result(job_id)
+        if job['status'] != 'completed':
+            return jsonify({'error': 'El trabajo todavía no terminó correctamente', 'job': job}), 409
+        
+        # Las importaciones no generan archivo: su resultado es el mismo JSON de import-csv
+        if result_path is None:
+            return jsonify(job['result'])
+        
+        if not os.path.isfile(result_path):
+            return jsonify({'error': 'El resultado del trabajo ya no está disponible'}), 410
+        
+        mimetype = EXCEL_MIMETYPE if job['result']['format'] == 'xlsx' else 'text/csv; charset=utf-8'
         return send_file(
-            temp_file_path,
+            result_path,
             as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            download_name=job['result']['filename'],
+            mimetype=mimetype
         )
-        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
-        return jsonify({'error': f'Error al exportar Excel de marcadores: {str(e)}'}), 500
+        return jsonify({'error': str(e)}), 500
 
 @main_bp.route('/api/articles/<int:article_id>/documents', methods=['POST'])
 def upload_document(article_id):
@@ -150,6 +475,78 @@ def upload_document(article_id):
     except Exception as e:
         return jsonify({'error': f'Error al subir documento: {str(e)}'}), 500
 
+@main_bp.route('/api/articles/<int:article_id>/documents/uploads', methods=['POST'])
+def create_document_upload(article_id):
+    try:
+        data = request.get_json(silent=True) or {}
+        doc_type = data.get('doc_type', 'original')
+        if doc_type not in ['original', 'translated']:
+            return jsonify({'error': 'Tipo de documento inválido'}), 400
+        
+        if not Article.get_by_id(article_id, ('id',)):
+            return jsonify({'error': 'Article not found'}), 404
+        
+        result = DocumentUploadService.create(
+            article_id, data.get('filename'), data.get('size'), doc_type, data.get('sha256')
+        )
+        return jsonify(result), 200 if result.get('completed') else 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error al iniciar la subida: {str(e)}'}), 500
+
+@main_bp.route('/api/documents/uploads/<upload_id>', methods=['GET'])
+def get_document_upload(upload_id):
+    try:
+        return jsonify(DocumentUploadService.status(upload_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+
+@main_bp.route('/api/documents/uploads/<upload_id>', methods=['PUT'])
+def append_document_upload(upload_id):
+    try:
+        try:
+            offset = int(request.args.get('offset', ''))
+        except ValueError:
+            return jsonify({'error': 'El parámetro offset debe ser un número entero'}), 400
+        
+        result = DocumentUploadService.append(upload_id, offset, request.stream, request.content_length)
+        return jsonify(result)
+    except OffsetMismatchError as e:
+        # El cliente debe continuar desde el offset que ya tiene el servidor
+        return jsonify({'error': str(e), 'offset': e.offset}), 409
+    except BlockingIOError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': f'Error al subir documento: {str(e)}'}), 500
+
+@main_bp.route('/api/documents/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_document_upload(upload_id):
+    try:
+        return jsonify(DocumentUploadService.finalize(upload_id))
+    except BlockingIOError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': f'Error al subir documento: {str(e)}'}), 500
+
+@main_bp.route('/api/documents/uploads/<upload_id>', methods=['DELETE'])
+def cancel_document_upload(upload_id):
+    try:
+        DocumentUploadService.cancel(upload_id)
+        return jsonify({'success': True})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @main_bp.route('/api/articles/<int:article_id>/documents/<doc_type>', methods=['DELETE'])
 def delete_document(article_id, doc_type):
     try:
@@ -164,18 +561,53 @@ def delete_document(article_id, doc_type):
     except Exception as e:
         return jsonify({'error': f'Error al eliminar documento: {str(e)}'}), 500
 
+def _document_response(filename, file_path):
+    """Respuesta de un documento con ETag fuerte, Last-Modified y rangos de bytes.
+    
+    Los archivos guardados por contenido (<sha256>.pdf) nunca cambian: su ETag es
+    el hash y se cachean como immutable. Con DOCUMENT_SENDFILE el servidor web
+    envía el archivo (sendfile) y Flask solo responde los encabezados.
+    """
+    content_named = DocumentService.is_content_filename(filename)
+    stat = os.stat(file_path)
+    etag = filename[:-len('.pdf')] if content_named else f'{int(stat.st_mtime)}-{stat.st_size}'
+    
+    if Config.DOCUMENT_SENDFILE == 'x-accel-redirect':
+        # nginx atiende los rangos; aquí solo se resuelven las peticiones condicionales
+        response = Response(mimetype='application/pdf')
+        response.headers['X-Accel-Redirect'] = Config.DOCUMENT_ACCEL_PREFIX.rstrip('/') + '/' + filename
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+    else:
+        response = werkzeug_send_from_directory(
+            DocumentService.get_upload_folder(), filename, request.environ,
+            mimetype='application/pdf',
+            conditional=True,
+            etag=etag,
+            last_modified=stat.st_mtime,
+            use_x_sendfile=Config.DOCUMENT_SENDFILE == 'x-sendfile'
+        )
+    
+    if content_named:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.DOCUMENT_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    
+    if Config.DOCUMENT_SENDFILE == 'x-accel-redirect':
+        response = response.make_conditional(request)
+    return response
+
 @main_bp.route('/api/documents/<filename>')
 def view_document(filename):
     try:
         file_path = DocumentService.get_document_path(filename)
-        if not os.path.exists(file_path):
+        if filename.startswith('.') or not os.path.isfile(file_path):
             return jsonify({'error': 'Documento no encontrado'}), 404
         
-        return send_file(
-            file_path,
-            mimetype='application/pdf',
-            as_attachment=False
-        )
+        return _document_response(filename, file_path)
         
     except Exception as e:
         return jsonify({'error': f'Error al mostrar documento: {str(e)}'}), 500
\ No newline at end of file
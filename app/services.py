@@ -1,53 +1,194 @@
 import csv
+import hashlib
 import io
+import json
 import os
+import re
+import shutil
 import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from werkzeug.utils import secure_filename
+from itertools import chain
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 
-from app.models import Article, ArticleDocument
+from app.config import Config
+from app.models import Article, ArticleDocument, DataVersion, DocumentBlob, Job
 
-class CSVService:
+class ImportSessionService:
+    """Guarda en disco las filas ya parseadas por check-csv para que import-csv
+    las confirme con un token, sin volver a subir ni parsear el archivo.
+    
+    Cada sesión es un archivo JSON Lines; al estar en disco funciona aunque
+    check-csv e import-csv los atienda un proceso distinto. Al confirmarla se
+    renombra a .consumed (claim) y, terminada la importación, queda vacía hasta
+    que vence: un reintento con el mismo token no vuelve a importar las filas.
+    """
+    TOKEN_PATTERN = re.compile(r'^[0-9a-f]{32}$')
     
     @staticmethod
-    def validate_csv_file(file):
-        if not file.filename.endswith('.csv'):
-            raise ValueError('Formato de archivo inválido')
+    def get_session_folder():
+        return os.path.join(tempfile.gettempdir(), 'mylib-import-sessions')
+    
+    @staticmethod
+    def _session_path(token, claimed=False):
+        if not token or not ImportSessionService.TOKEN_PATTERN.match(token):
+            raise ValueError('Token de importación inválido')
+        extension = 'consumed' if claimed else 'jsonl'
+        return os.path.join(ImportSessionService.get_session_folder(), f'{token}.{extension}')
+    
+    # Segundos que se conserva una sesión reclamada: su trabajo puede esperar en la
+    # cola bastante más que IMPORT_SESSION_TTL antes de leer las filas
+    CLAIMED_SESSION_TTL = Config.JOB_RESULT_TTL
+    
+    @staticmethod
+    def evict_expired():
+        """Elimina las sesiones cuyo TTL ya venció (CLAIMED_SESSION_TTL si están reclamadas)"""
+        folder = ImportSessionService.get_session_folder()
+        if not os.path.exists(folder):
+            return
         
-        content = file.stream.read()
+        now = time.time()
+        for entry in os.scandir(folder):
+            ttl = (ImportSessionService.CLAIMED_SESSION_TTL if entry.name.endswith('.consumed')
+                   else Config.IMPORT_SESSION_TTL)
+            try:
+                if entry.is_file() and entry.stat().st_mtime < now - ttl:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def create():
+        """Crea una sesión nueva y retorna (token, archivo abierto para escribir filas)"""
+        ImportSessionService.evict_expired()
+        os.makedirs(ImportSessionService.get_session_folder(), exist_ok=True)
         
+        token = uuid.uuid4().hex
+        session_file = open(ImportSessionService._session_path(token), 'w', encoding='utf-8')
+        return token, session_file
+    
+    @staticmethod
+    def exists(token):
         try:
-            decoded_content = content.decode('utf-8-sig')
-        except UnicodeDecodeError:
+            path = ImportSessionService._session_path(token)
+            return os.path.getmtime(path) >= time.time() - Config.IMPORT_SESSION_TTL
+        except (ValueError, OSError):
+            return False
+    
+    @staticmethod
+    def discard(token):
+        for claimed in (False, True):
             try:
-                decoded_content = content.decode('utf-8')
-            except UnicodeDecodeError:
-                decoded_content = content.decode('UTF8')
+                os.remove(ImportSessionService._session_path(token, claimed))
+            except (ValueError, OSError):
+                pass
+    
+    @staticmethod
+    def claim(token):
+        """Reclama la sesión para una única importación.
         
-        stream = io.StringIO(decoded_content, newline=None)
-        csv_reader = csv.DictReader(stream)
+        os.rename es atómico: si llegan dos confirmaciones con el mismo token (por
+        ejemplo un reintento tras un timeout) solo una obtiene las filas. Lanza
+        FileExistsError si la sesión ya fue reclamada y FileNotFoundError si no
+        existe o expiró.
+        """
+        path = ImportSessionService._session_path(token)
+        claimed_path = ImportSessionService._session_path(token, claimed=True)
         
-        dois_in_csv = []
-        for row in csv_reader:
-            doi = row.get('DOI', '').strip()
-            if doi:
-                dois_in_csv.append(doi)
+        if not ImportSessionService.exists(token):
+            if os.path.exists(claimed_path):
+                raise FileExistsError('La importación de esta sesión ya está en curso o terminó')
+            raise FileNotFoundError('La sesión de importación no existe o expiró')
+        
+        try:
+            os.rename(path, claimed_path)
+        except FileNotFoundError:
+            raise FileExistsError('La importación de esta sesión ya está en curso o terminó')
+        
+        # El TTL de la sesión reclamada cuenta desde el reclamo
+        os.utime(claimed_path)
+    
+    @staticmethod
+    def release(token):
+        """Deshace un reclamo cuya importación no llegó a empezar"""
+        try:
+            os.rename(ImportSessionService._session_path(token, claimed=True),
+                      ImportSessionService._session_path(token))
+        except (ValueError, OSError):
+            pass
+    
+    @staticmethod
+    def count_rows(token):
+        """Cantidad de filas guardadas en una sesión reclamada"""
+        with open(ImportSessionService._session_path(token, claimed=True), 'rb') as session_file:
+            return sum(1 for _ in session_file)
+    
+    @staticmethod
+    @contextmanager
+    def open_rows(token):
+        """Entrega de forma perezosa las filas de una sesión reclamada con claim().
+        
+        Si la importación termina bien el archivo queda vacío (marca de sesión usada)
+        hasta que vence. Si falla, la transacción se revierte y el reclamo se deshace
+        para que el mismo token pueda volver a importarse sin validar otra vez el CSV.
+        """
+        path = ImportSessionService._session_path(token, claimed=True)
+        try:
+            with open(path, 'r', encoding='utf-8') as session_file:
+                yield (json.loads(line) for line in session_file)
+        except BaseException:
+            ImportSessionService.release(token)
+            raise
+        
+        try:
+            open(path, 'w').close()
+        except OSError:
+            pass
+
+class CSVService:
+    # Filas fallidas que se detallan en el resultado de una importación
+    MAX_REPORTED_FAILURES = 100
+    
+    @staticmethod
+    @contextmanager
+    def _open_csv_reader(file):
+        """Lee el CSV subido decodificándolo de forma incremental (UTF-8 con o sin BOM),
+        sin cargar el archivo completo en memoria"""
+        text_stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline=None)
+        try:
+            yield csv.DictReader(text_stream)
+        finally:
+            # Soltar el stream de werkzeug sin cerrarlo
+            text_stream.detach()
+    
+    @staticmethod
+    def validate_csv_file(file):
+        """Valida el CSV y deja sus filas en una sesión de importación.
+        
+        El token devuelto (import_token) permite confirmar la importación con
+        import_csv_session() sin volver a subir el archivo.
+        """
+        token, dois_in_csv = CSVService.spool_csv_file(file)
         
         existing_articles = []
         new_articles = []
         
         if dois_in_csv:
             existing_results = Article.check_multiple_dois(dois_in_csv)
-            existing_dois = {row[0]: row[1] for row in existing_results}
+            existing_dois = {row[0].lower(): row[1] for row in existing_results}
             
             for doi in dois_in_csv:
-                if doi in existing_dois:
+                if doi.lower() in existing_dois:
                     existing_articles.append({
                         'doi': doi,
-                        'titulo_original': existing_dois[doi]
+                        'titulo_original': existing_dois[doi.lower()]
                     })
                 else:
                     new_articles.append({'doi': doi})
@@ -61,6 +202,7 @@ class CSVService:
                 'new_count': len(new_articles),
                 'existing_articles': existing_articles,
                 'has_duplicates': True,
+                'import_token': token,
                 'message': f'Se encontraron {len(existing_articles)} artículos que ya existen en la base de datos.'
             }
         else:
@@ -71,72 +213,119 @@ class CSVService:
                 'new_count': len(new_articles),
                 'existing_articles': existing_articles,
                 'has_duplicates': False,
+                'import_token': token,
                 'message': f'Archivo validado correctamente. {len(new_articles)} artículos nuevos listos para importar.'
             }
     
     @staticmethod
-    def import_csv_file(file, force_import=False):
+    def spool_csv_file(file):
+        """Guarda las filas del CSV en una sesión de importación sin validarlas contra
+        la base; retorna (token, DOIs del archivo)"""
         if not file.filename.endswith('.csv'):
             raise ValueError('Formato de archivo inválido')
         
-        # Leer el contenido del archivo y manejar UTF-8 BOM
-        content = file.stream.read()
-        
-        # Intentar decodificar como UTF-8 con BOM primero
+        dois_in_csv = []
+        token, session_file = ImportSessionService.create()
         try:
-            decoded_content = content.decode('utf-8-sig')
-        except UnicodeDecodeError:
-            # Si falla, intentar UTF-8 normal
-            try:
-                decoded_content = content.decode('utf-8')
-            except UnicodeDecodeError:
-                # Como último recurso, intentar con la codificación original
-                decoded_content = content.decode('UTF8')
+            with session_file, CSVService._open_csv_reader(file) as csv_reader:
+                for row in csv_reader:
+                    article_data = CSVService._row_to_article_data(row)
+                    session_file.write(json.dumps(article_data, ensure_ascii=False) + '\n')
+                    
+                    doi = article_data['doi']
+                    if doi:
+                        dois_in_csv.append(doi)
+        except Exception:
+            ImportSessionService.discard(token)
+            raise
         
-        stream = io.StringIO(decoded_content, newline=None)
-        csv_reader = csv.DictReader(stream)
+        return token, dois_in_csv
+    
+    @staticmethod
+    def iter_export_csv(bookmarks_only=False, flush_every=500, progress=None):
+        """Genera la exportación en CSV por bloques a medida que se leen los artículos,
+        para enviarla al cliente sin construir el archivo completo"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
         
-        imported_count = 0
-        skipped_count = 0
+        # BOM para que Excel detecte UTF-8 al abrir el CSV
+        buffer.write('\ufeff')
+        writer.writerow(ExcelService.HEADERS)
         
-        for row in csv_reader:
-            doi = row.get('DOI', '').strip()
-            
-            if not force_import and doi:
-                if Article.check_doi_exists(doi):
-                    skipped_count += 1
-                    continue
-            
-            try:
-                article_data = {
-                    'autor': row.get('Authors', ''),
-                    'nombre_revista': row.get('Source title', ''),
-                    'anio': row.get('Year', ''),
-                    'doi': doi,
-                    'titulo_original': row.get('Title', ''),
-                    'base_datos': 'Scopus',
-                    'abstract': row.get('Abstract', ''),
-                    'keywords_autor': row.get('Author Keywords', ''),
-                    'keywords_indexed': row.get('Index Keywords', ''),
-                    'enlace': row.get('Link', ''),
-                    'eid': row.get('EID', '')
-                }
-                
-                Article.create(article_data)
-                imported_count += 1
-                
-            except Exception as e:
-                print(f"Error importing row: {e}")
+        row_count = 0
+        for row_count, article in enumerate(Article.iter_for_export(bookmarks_only), 1):
+            writer.writerow([ExcelService._escape_excel_formula(value) for value in article])
+            if row_count % flush_every == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate(0)
+                if progress:
+                    progress(row_count)
         
+        yield buffer.getvalue().encode('utf-8')
+        if progress:
+            progress(row_count)
+    
+    @staticmethod
+    def _row_to_article_data(row):
+        """Mapea una fila del CSV de Scopus a las columnas de articulos"""
+        return {
+            'autor': row.get('Authors', ''),
+            'nombre_revista': row.get('Source title', ''),
+            'anio': row.get('Year', ''),
+            'doi': row.get('DOI', '').strip(),
+            'titulo_original': row.get('Title', ''),
+            'base_datos': 'Scopus',
+            'abstract': row.get('Abstract', ''),
+            'keywords_autor': row.get('Author Keywords', ''),
+            'keywords_indexed': row.get('Index Keywords', ''),
+            'enlace': row.get('Link', ''),
+            'eid': row.get('EID', '')
+        }
+    
+    @staticmethod
+    def import_csv_file(file, force_import=False, progress=None):
+        if not file.filename.endswith('.csv'):
+            raise ValueError('Formato de archivo inválido')
+        
+        # Las filas se decodifican y se envían al importador por bloques a medida que se leen
+        with CSVService._open_csv_reader(file) as csv_reader:
+            articles_data = (CSVService._row_to_article_data(row) for row in csv_reader)
+            imported_count, skipped_count, failed_rows = Article.bulk_create(articles_data, force_import, progress=progress)
+        
+        return CSVService._import_result(imported_count, skipped_count, failed_rows)
+    
+    @staticmethod
+    def import_csv_session(token, force_import=False, progress=None):
+        """Importa las filas que check-csv dejó en la sesión indicada, reclamándola
+        antes para que el mismo token no pueda importarse dos veces"""
+        ImportSessionService.claim(token)
+        return CSVService.import_claimed_session(token, force_import, progress)
+    
+    @staticmethod
+    def import_claimed_session(token, force_import=False, progress=None):
+        """Importa una sesión ya reclamada con ImportSessionService.claim()"""
+        with ImportSessionService.open_rows(token) as articles_data:
+            imported_count, skipped_count, failed_rows = Article.bulk_create(articles_data, force_import, progress=progress)
+        
+        return CSVService._import_result(imported_count, skipped_count, failed_rows)
+    
+    @staticmethod
+    def _import_result(imported_count, skipped_count, failed_rows=()):
         message = f'{imported_count} artículos importados'
         if skipped_count > 0:
             message += f', {skipped_count} omitidos (ya existían)'
+        if failed_rows:
+            message += f', {len(failed_rows)} con errores'
         
         return {
             'status': 'success',
             'message': message,
             'imported_count': imported_count,
-            'skipped_count': skipped_count
+            'skipped_count': skipped_count,
+            'failed_count': len(failed_rows),
+            # Detalle acotado para no inflar la respuesta con archivos muy dañados
+            'failed_rows': list(failed_rows[:CSVService.MAX_REPORTED_FAILURES])
         }
 
 class ExcelService:
@@ -189,6 +378,14 @@ class ExcelService:
     # Columnas que requieren ajuste de texto (títulos, abstract, resumen)
     TEXT_WRAP_COLUMNS = [6, 7, 9, 10]
     
+    # Estilos compartidos por todas las celdas que los usan
+    HEADER_FONT = Font(bold=True, color='FFFFFF')
+    HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    WRAP_ALIGNMENT = Alignment(wrap_text=True, vertical='top')
+    
+    # Filas escritas entre cada aviso de progreso
+    PROGRESS_EVERY = 500
+    
     @staticmethod
     def _escape_excel_formula(value):
         if value is None:
@@ -206,99 +403,215 @@ class ExcelService:
         local_time = datetime.now()
         return local_time.strftime('%Y-%m-%d--%H-%M-%S')
     
+    @staticmethod
+    def _styled_cell(ws, value, font=None, fill=None, alignment=None):
+        cell = WriteOnlyCell(ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if alignment:
+            cell.alignment = alignment
+        return cell
+    
     @staticmethod
     def _setup_header(ws, header_color='366092'):
-        """Configura el encabezado del worksheet con estilo"""
-        header_font = Font(bold=True, color='FFFFFF')
+        """Escribe el encabezado del worksheet (write-only) con estilo"""
         header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type='solid')
-        header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
         
-        for col, header in enumerate(ExcelService.HEADERS, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
+        ws.append([
+            ExcelService._styled_cell(ws, header, ExcelService.HEADER_FONT, header_fill, ExcelService.HEADER_ALIGNMENT)
+            for header in ExcelService.HEADERS
+        ])
     
     @staticmethod
-    def _populate_data(ws, articles):
-        """Llena el worksheet con los datos de los artículos"""
-        for row_idx, article in enumerate(articles, 2):
-            for col_idx, value in enumerate(article, 1):
+    def _populate_data(ws, articles, progress=None):
+        """Escribe las filas de los artículos a medida que llegan del cursor"""
+        wrap_indexes = {col - 1 for col in ExcelService.TEXT_WRAP_COLUMNS}
+        
+        row_count = 0
+        for row_count, article in enumerate(articles, 1):
+            row = []
+            for col_idx, value in enumerate(article):
                 escaped_value = ExcelService._escape_excel_formula(value)
-                cell = ws.cell(row=row_idx, column=col_idx, value=escaped_value)
-                # Ajustar texto para campos largos
-                if col_idx in ExcelService.TEXT_WRAP_COLUMNS:
-                    cell.alignment = Alignment(wrap_text=True, vertical='top')
+                # Ajustar texto para campos largos (estilo compartido, no uno por celda)
+                if col_idx in wrap_indexes:
+                    row.append(ExcelService._styled_cell(ws, escaped_value, alignment=ExcelService.WRAP_ALIGNMENT))
+                else:
+                    row.append(escaped_value)
+            ws.append(row)
+            if progress and row_count % ExcelService.PROGRESS_EVERY == 0:
+                progress(row_count)
+        
+        if progress:
+            progress(row_count)
     
     @staticmethod
     def _set_column_widths(ws):
-        """Configura los anchos de columna"""
+        """Configura los anchos de columna (en write-only debe hacerse antes de escribir filas)"""
         for col, width in ExcelService.COLUMN_WIDTHS.items():
-            ws.column_dimensions[ws.cell(row=1, column=col).column_letter].width = width
+            ws.column_dimensions[get_column_letter(col)].width = width
     
     @staticmethod
     def _save_workbook(wb, base_filename):
-        """Guarda el workbook y retorna el path y filename"""
+        """Guarda el workbook en un archivo temporal anónimo y retorna (archivo, filename).
+        
+        El archivo queda en memoria hasta EXPORT_SPOOL_MAX_SIZE y luego pasa a disco;
+        se elimina solo al cerrarlo (send_file lo cierra al terminar la respuesta).
+        """
         timestamp = ExcelService._get_local_timestamp()
         filename = f'{base_filename}-{timestamp}.xlsx'
         
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-        wb.save(temp_file.name)
-        temp_file.close()
+        export_file = tempfile.SpooledTemporaryFile(max_size=Config.EXPORT_SPOOL_MAX_SIZE, suffix='.xlsx')
+        try:
+            wb.save(export_file)
+        except Exception:
+            export_file.close()
+            raise
         
-        return temp_file.name, filename
+        export_file.seek(0)
+        return export_file, filename
     
     @staticmethod
-    def _create_empty_bookmarks_sheet(ws):
+    def _create_empty_bookmarks_sheet(wb):
         """Crea una hoja para marcadores vacía con mensaje informativo"""
-        ws.title = "Marcadores (Vacío)"
+        ws = wb.create_sheet("Marcadores (Vacío)")
+        ExcelService._set_column_widths(ws)
         ExcelService._setup_header(ws)
         
-        # Agregar mensaje informativo
-        ws.cell(row=2, column=1, value="No hay artículos marcados como favoritos")
-        ws.merge_cells('A2:AE2')
-        
-        # Centrar y estilizar el mensaje
-        message_cell = ws.cell(row=2, column=1)
-        message_cell.alignment = Alignment(horizontal='center', vertical='center')
-        message_cell.font = Font(italic=True, color='666666')
+        # Agregar mensaje informativo centrado y estilizado
+        ws.append([ExcelService._styled_cell(
+            ws, "No hay artículos marcados como favoritos",
+            font=Font(italic=True, color='666666'),
+            alignment=Alignment(horizontal='center', vertical='center')
+        )])
+        ws.merged_cells.add('A2:AE2')
     
     @staticmethod
-    def create_excel_export():
-        """Crea exportación Excel con todos los artículos"""
-        articles = Article.get_all_for_export()
+    def create_excel_export(progress=None):
+        """Crea exportación Excel con todos los artículos.
         
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Análisis de Artículos"
+        Usa un workbook write-only alimentado por un cursor del lado del servidor,
+        por lo que la memoria no crece con la cantidad de artículos.
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Análisis de Artículos")
         
-        ExcelService._setup_header(ws)
-        ExcelService._populate_data(ws, articles)
         ExcelService._set_column_widths(ws)
+        ExcelService._setup_header(ws)
+        ExcelService._populate_data(ws, Article.iter_for_export(), progress)
         
         return ExcelService._save_workbook(wb, 'matriz-analisis')
     
     @staticmethod
-    def create_excel_export_bookmarks():
+    def create_excel_export_bookmarks(progress=None):
         """Crea exportación Excel solo con artículos marcados como favoritos"""
-        articles = Article.get_bookmarks_for_export()
+        articles = Article.iter_for_export(bookmarks_only=True)
+        first_article = next(articles, None)
         
-        wb = Workbook()
-        ws = wb.active
+        wb = Workbook(write_only=True)
         
-        if not articles:
+        if first_article is None:
             # Crear hoja vacía con mensaje informativo
-            ExcelService._create_empty_bookmarks_sheet(ws)
+            ExcelService._create_empty_bookmarks_sheet(wb)
         else:
             # Crear hoja con datos de marcadores
-            ws.title = "Marcadores - Análisis"
+            ws = wb.create_sheet("Marcadores - Análisis")
+            ExcelService._set_column_widths(ws)
             ExcelService._setup_header(ws, header_color='1F4E79')  # Azul más oscuro para marcadores
-            ExcelService._populate_data(ws, articles)
+            ExcelService._populate_data(ws, chain([first_article], articles), progress)
         
-        ExcelService._set_column_widths(ws)
         return ExcelService._save_workbook(wb, 'matriz-marcadores')
 
 
+class ExportCacheService:
+    """Cache en disco de exportaciones ya generadas, identificadas por tipo y por la
+    versión de datos de articulos; mientras los datos no cambien se reutilizan"""
+    
+    @staticmethod
+    def get_cache_folder():
+        return os.path.join(tempfile.gettempdir(), 'mylib-export-cache')
+    
+    @staticmethod
+    def _cache_path(kind, version, extension):
+        return os.path.join(ExportCacheService.get_cache_folder(), f'{kind}-v{version}.{extension}')
+    
+    @staticmethod
+    def etag(kind, version, extension):
+        return f'{kind}-v{version}-{extension}'
+    
+    @staticmethod
+    def get(kind, version, extension):
+        """Retorna el path del archivo en cache o None"""
+        path = ExportCacheService._cache_path(kind, version, extension)
+        try:
+            # Actualizar mtime para que la evicción por tamaño descarte primero lo menos usado
+            os.utime(path)
+            return path
+        except OSError:
+            return None
+    
+    @staticmethod
+    def store(kind, version, extension, source_file):
+        """Copia la exportación generada al cache y retorna su path"""
+        folder = ExportCacheService.get_cache_folder()
+        os.makedirs(folder, exist_ok=True)
+        
+        path = ExportCacheService._cache_path(kind, version, extension)
+        fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                shutil.copyfileobj(source_file, target)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        ExportCacheService.evict(keep=path)
+        return path
+    
+    @staticmethod
+    def evict(keep=None):
+        """Elimina versiones obsoletas y lo que exceda la antigüedad o el tamaño máximo"""
+        folder = ExportCacheService.get_cache_folder()
+        if not os.path.exists(folder):
+            return
+        
+        now = time.time()
+        kept_prefix = os.path.basename(keep).rsplit('-v', 1)[0] + '-v' if keep else None
+        entries = []
+        total_size = 0
+        
+        for entry in os.scandir(folder):
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.path == keep:
+                    total_size += stat.st_size
+                    continue
+                
+                # Otra versión del mismo tipo de exportación ya no se volverá a pedir
+                stale = kept_prefix and entry.name.startswith(kept_prefix)
+                if stale or now - stat.st_mtime > Config.EXPORT_CACHE_MAX_AGE:
+                    os.remove(entry.path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+            except OSError:
+                pass
+        
+        for _, size, path in sorted(entries):
+            if total_size <= Config.EXPORT_CACHE_MAX_SIZE:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+
+
 class DocumentService:
     @staticmethod
     def get_upload_folder():
@@ -308,6 +621,14 @@ class DocumentService:
     ALLOWED_EXTENSIONS = {'pdf'}
     MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
     
+    # Archivos guardados por contenido: <sha256>.pdf
+    CONTENT_FILENAME_PATTERN = re.compile(r'^[0-9a-f]{64}\.pdf$')
+    HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+    COPY_BLOCK_SIZE = 64 * 1024
+    
+    # Margen antes de borrar un archivo sin referencias (puede estar volviendo a subirse)
+    UNREFERENCED_GRACE_SECONDS = 5 * 60
+    
     @staticmethod
     def _create_upload_folder():
         upload_folder = DocumentService.get_upload_folder()
@@ -319,13 +640,6 @@ class DocumentService:
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in DocumentService.ALLOWED_EXTENSIONS
     
-    @staticmethod
-    def _generate_unique_filename(original_filename):
-        filename = secure_filename(original_filename)
-        name, ext = os.path.splitext(filename)
-        unique_name = f"{name}_{uuid.uuid4().hex}{ext}"
-        return unique_name
-    
     @staticmethod
     def upload_document(file, article_id, doc_type='original'):
         try:
@@ -336,63 +650,19 @@ class DocumentService:
             if not DocumentService._allowed_file(file.filename):
                 raise ValueError('Solo se permiten archivos PDF')
             
-            file.seek(0, os.SEEK_END)
-            file_size = file.tell()
-            file.seek(0)
-            
-            if file_size > DocumentService.MAX_FILE_SIZE:
-                raise ValueError('El archivo es demasiado grande (máximo 16MB)')
-            
             DocumentService._create_upload_folder()
             
-            unique_filename = DocumentService._generate_unique_filename(file.filename)
-            upload_folder = DocumentService.get_upload_folder()
-            file_path = os.path.join(upload_folder, unique_filename)
-            file.save(file_path)
+            # Copiar a un temporal calculando el SHA-256 en la misma pasada
+            file_path = DocumentService._temp_path()
+            with open(file_path, 'wb') as destination:
+                content_hash, file_size = DocumentService._copy_hashed(
+                    file.stream, destination, DocumentService.MAX_FILE_SIZE
+                )
             
-            existing_docs = ArticleDocument.get_by_article_id(article_id)
-            existing_doc = None
-            
-            for doc in existing_docs:
-                doc_dict = ArticleDocument.to_dict(doc)
-                if doc_type == 'original' and doc_dict['nombre_archivo_original']:
-                    existing_doc = doc_dict
-                    break
-                elif doc_type == 'translated' and doc_dict['nombre_archivo_traducido']:
-                    existing_doc = doc_dict
-                    break
+            if file_size > DocumentService.MAX_FILE_SIZE:
+                raise ValueError('El archivo es demasiado grande (máximo 16MB)')
             
-            if existing_doc:
-                if doc_type == 'original':
-                    old_file = existing_doc['nombre_archivo_original']
-                    if old_file:
-                        upload_folder = DocumentService.get_upload_folder()
-                        old_path = os.path.join(upload_folder, old_file)
-                        if os.path.exists(old_path):
-                            os.remove(old_path)
-                    
-                    ArticleDocument.delete_by_article_and_type(article_id, 'original')
-                    ArticleDocument.create(article_id, unique_filename, None)
-                
-                elif doc_type == 'translated':
-                    old_file = existing_doc['nombre_archivo_traducido']
-                    if old_file:
-                        upload_folder = DocumentService.get_upload_folder()
-                        old_path = os.path.join(upload_folder, old_file)
-                        if os.path.exists(old_path):
-                            os.remove(old_path)
-                    
-                    ArticleDocument.update_translated_filename(article_id, unique_filename)
-            else:
-                if doc_type == 'original':
-                    ArticleDocument.create(article_id, unique_filename, None)
-                elif doc_type == 'translated':
-                    original_docs = [doc for doc in existing_docs 
-                                   if ArticleDocument.to_dict(doc)['nombre_archivo_original']]
-                    if original_docs:
-                        ArticleDocument.update_translated_filename(article_id, unique_filename)
-                    else:
-                        ArticleDocument.create(article_id, None, unique_filename)
+            unique_filename = DocumentService._store_content(file_path, content_hash, file_size, article_id, doc_type)
             
             return {
                 'success': True,
@@ -410,6 +680,155 @@ class DocumentService:
             
             raise ValueError(str(e))
     
+    @staticmethod
+    def _temp_path():
+        """Ruta temporal dentro de uploads/ (mismo disco: el paso final es un os.replace)"""
+        folder = os.path.join(DocumentService.get_upload_folder(), '.partial')
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f'{uuid.uuid4().hex}.tmp')
+    
+    @staticmethod
+    def _copy_hashed(source, destination, max_size=None):
+        """Copia source en destination por bloques y devuelve (sha256, tamaño).
+        Se detiene al superar max_size (el tamaño devuelto lo indica)."""
+        digest = hashlib.sha256()
+        size = 0
+        while True:
+            block = source.read(DocumentService.COPY_BLOCK_SIZE)
+            if not block:
+                break
+            size += len(block)
+            if max_size is not None and size > max_size:
+                break
+            digest.update(block)
+            destination.write(block)
+        return digest.hexdigest(), size
+    
+    @staticmethod
+    def content_filename(content_hash):
+        return f'{content_hash}.pdf'
+    
+    @staticmethod
+    def _store_content(temp_path, content_hash, size, article_id, doc_type):
+        """Guarda el archivo temporal como <sha256>.pdf y lo asocia al artículo; si ese
+        contenido ya existe el temporal se descarta y no se vuelve a escribir.
+        
+        Registro, archivo y asociación se resuelven en una transacción con el lock
+        del hash, así collect_garbage() no puede borrar el archivo entre que se
+        comprueba que existe y se referencia.
+        """
+        filename = DocumentService.content_filename(content_hash)
+        final_path = DocumentService.get_document_path(filename)
+        
+        with DocumentBlob.locked(content_hash) as cur:
+            DocumentBlob.register(cur, content_hash, filename, size)
+            
+            placed = not os.path.exists(final_path)
+            if placed:
+                os.replace(temp_path, final_path)
+            else:
+                os.remove(temp_path)
+            
+            try:
+                replaced_file = DocumentService._link_document(cur, article_id, doc_type, filename)
+            except Exception:
+                # El registro se revierte: no dejar en disco un archivo que nadie registra
+                if placed:
+                    os.remove(final_path)
+                raise
+        
+        DocumentService._release_file(replaced_file)
+        return filename
+    
+    @staticmethod
+    def link_existing(article_id, doc_type, content_hash):
+        """Asocia al artículo un contenido ya guardado, con el lock del hash tomado
+        (como _store_content). Retorna el nombre del archivo, o None si ese contenido
+        no está guardado y hay que subirlo."""
+        if not content_hash or not DocumentService.HASH_PATTERN.match(content_hash):
+            return None
+        
+        with DocumentBlob.locked(content_hash) as cur:
+            filename = DocumentBlob.touch(cur, content_hash)
+            if not filename or not os.path.exists(DocumentService.get_document_path(filename)):
+                return None
+            replaced_file = DocumentService._link_document(cur, article_id, doc_type, filename)
+        
+        DocumentService._release_file(replaced_file)
+        return filename
+    
+    @staticmethod
+    def _release_file(filename):
+        """Se llama cuando un archivo deja de estar referenciado por el artículo.
+        Los archivos anteriores al almacenamiento por contenido son únicos por subida
+        y se borran de inmediato; los demás los borra collect_garbage() cuando su
+        contador de referencias llega a cero."""
+        if not filename:
+            return
+        
+        if not DocumentService.is_content_filename(filename):
+            file_path = DocumentService.get_document_path(filename)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        
+        DocumentService.collect_garbage()
+    
+    @staticmethod
+    def collect_garbage():
+        """Borra del disco los archivos por contenido que ya nadie referencia.
+        Cada uno se borra con el lock de su hash (ver _store_content)."""
+        grace_seconds = DocumentService.UNREFERENCED_GRACE_SECONDS
+        for content_hash in DocumentBlob.find_unreferenced(grace_seconds):
+            with DocumentBlob.locked(content_hash) as cur:
+                # Si entretanto se volvió a subir o a referenciar, se conserva
+                filename = DocumentBlob.delete_unreferenced(cur, content_hash, grace_seconds)
+                if not filename:
+                    continue
+                try:
+                    os.remove(DocumentService.get_document_path(filename))
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _link_document(cur, article_id, doc_type, unique_filename):
+        """Asocia un archivo ya guardado en uploads/ al artículo dentro de la transacción
+        de cur, reemplazando el documento anterior del mismo tipo. Retorna el archivo
+        reemplazado, que se libera con _release_file() después del commit (o None)."""
+        existing_docs = ArticleDocument.get_by_article_id(article_id, cur)
+        existing_doc = None
+        
+        for doc in existing_docs:
+            doc_dict = ArticleDocument.to_dict(doc)
+            if doc_type == 'original' and doc_dict['nombre_archivo_original']:
+                existing_doc = doc_dict
+                break
+            elif doc_type == 'translated' and doc_dict['nombre_archivo_traducido']:
+                existing_doc = doc_dict
+                break
+        
+        old_file = None
+        if existing_doc:
+            if doc_type == 'original':
+                old_file = existing_doc['nombre_archivo_original']
+                ArticleDocument.delete_by_article_and_type(article_id, 'original', cur)
+                ArticleDocument.create(article_id, unique_filename, None, cur)
+            
+            elif doc_type == 'translated':
+                old_file = existing_doc['nombre_archivo_traducido']
+                ArticleDocument.update_translated_filename(article_id, unique_filename, cur)
+        else:
+            if doc_type == 'original':
+                ArticleDocument.create(article_id, unique_filename, None, cur)
+            elif doc_type == 'translated':
+                original_docs = [doc for doc in existing_docs 
+                               if ArticleDocument.to_dict(doc)['nombre_archivo_original']]
+                if original_docs:
+                    ArticleDocument.update_translated_filename(article_id, unique_filename, cur)
+                else:
+                    ArticleDocument.create(article_id, None, unique_filename, cur)
+        
+        return old_file if old_file != unique_filename else None
+    
     @staticmethod
     def delete_document(article_id, doc_type):
         try:
@@ -428,13 +847,9 @@ class DocumentService:
             if not filename_to_delete:
                 raise ValueError('No se encontró el documento a eliminar')
             
-            upload_folder = DocumentService.get_upload_folder()
-            file_path = os.path.join(upload_folder, filename_to_delete)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            
-            # Eliminar de base de datos
+            # Eliminar de base de datos y liberar el archivo (otro artículo puede compartirlo)
             ArticleDocument.delete_by_article_and_type(article_id, doc_type)
+            DocumentService._release_file(filename_to_delete)
             
             return {
                 'success': True,
@@ -444,7 +859,579 @@ class DocumentService:
         except Exception as e:
             raise ValueError(str(e))
     
+    @staticmethod
+    def is_content_filename(filename):
+        return bool(DocumentService.CONTENT_FILENAME_PATTERN.match(filename))
+    
     @staticmethod
     def get_document_path(filename):
         upload_folder = DocumentService.get_upload_folder()
-        return os.path.join(upload_folder, filename)
\ No newline at end of file
+        return os.path.join(upload_folder, filename)
+
+class OffsetMismatchError(Exception):
+    """La parte recibida no continúa donde quedó la subida"""
+    def __init__(self, offset):
+        super().__init__(f'Se esperaba la parte en el offset {offset}')
+        self.offset = offset
+
+class DocumentUploadService:
+    """Subida de PDF por partes (init / append / finalize) que se puede reanudar.
+    
+    Cada subida se escribe directamente en uploads/.partial/<id>.part; el offset
+    es el tamaño de ese archivo, así que sobrevive a reinicios y a cortes de red:
+    el cliente consulta el offset y continúa desde ahí. Los datos de la subida
+    (artículo, tipo, nombre y tamaño esperado) van en <id>.json junto al .part.
+    """
+    UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+    WRITE_BLOCK_SIZE = 64 * 1024
+    
+    # SHA-256 parcial de cada subida (upload_id -> (offset, hash)) calculado mientras
+    # llegan las partes; si la subida continúa en otro proceso finalize relee el archivo
+    _hashers = {}
+    _hashers_lock = threading.Lock()
+    
+    # Un lock huérfano (proceso caído a mitad de una parte) se ignora pasado este tiempo
+    LOCK_STALE_SECONDS = 10 * 60
+    
+    @staticmethod
+    def get_partial_folder():
+        return os.path.join(DocumentService.get_upload_folder(), '.partial')
+    
+    @staticmethod
+    def _paths(upload_id):
+        if not upload_id or not DocumentUploadService.UPLOAD_ID_PATTERN.match(upload_id):
+            raise ValueError('Identificador de subida inválido')
+        base = os.path.join(DocumentUploadService.get_partial_folder(), upload_id)
+        return f'{base}.part', f'{base}.json', f'{base}.lock'
+    
+    @staticmethod
+    def evict_expired():
+        """Elimina las subidas incompletas sin actividad durante DOCUMENT_UPLOAD_TTL
+        y sus hashes parciales en memoria"""
+        folder = DocumentUploadService.get_partial_folder()
+        if os.path.exists(folder):
+            limit = time.time() - Config.DOCUMENT_UPLOAD_TTL
+            for entry in os.scandir(folder):
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < limit:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+        
+        # Hashes parciales de subidas ya eliminadas (o finalizadas en otro proceso)
+        with DocumentUploadService._hashers_lock:
+            for upload_id in list(DocumentUploadService._hashers):
+                if not os.path.exists(DocumentUploadService._paths(upload_id)[0]):
+                    del DocumentUploadService._hashers[upload_id]
+    
+    @staticmethod
+    def create(article_id, filename, size, doc_type='original', content_hash=None):
+        """Registra una subida nueva y retorna su estado (upload_id, offset 0).
+        
+        Si el cliente envía el SHA-256 y ese contenido ya está guardado, el documento
+        se asocia de inmediato y no hace falta subir ningún byte (completed=True).
+        """
+        if not filename or not DocumentService._allowed_file(filename):
+            raise ValueError('Solo se permiten archivos PDF')
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError('El tamaño del archivo es inválido')
+        if size > Config.DOCUMENT_MAX_SIZE:
+            raise ValueError(f'El archivo es demasiado grande (máximo {Config.DOCUMENT_MAX_SIZE // (1024 * 1024)}MB)')
+        
+        existing_filename = DocumentService.link_existing(article_id, doc_type, content_hash)
+        if existing_filename:
+            return {
+                'completed': True,
+                'success': True,
+                'message': f'Documento {doc_type} subido correctamente',
+                'filename': existing_filename,
+                'original_filename': filename
+            }
+        
+        DocumentUploadService.evict_expired()
+        os.makedirs(DocumentUploadService.get_partial_folder(), exist_ok=True)
+        
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path, _ = DocumentUploadService._paths(upload_id)
+        
+        with open(meta_path, 'w', encoding='utf-8') as meta_file:
+            json.dump({
+                'article_id': article_id,
+                'doc_type': doc_type,
+                'filename': filename,
+                'size': size
+            }, meta_file)
+        open(part_path, 'wb').close()
+        
+        return DocumentUploadService.status(upload_id)
+    
+    @staticmethod
+    def _load(upload_id):
+        part_path, meta_path, _ = DocumentUploadService._paths(upload_id)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            meta['offset'] = os.path.getsize(part_path)
+        except (OSError, ValueError):
+            raise FileNotFoundError('La subida no existe o ya expiró')
+        return meta
+    
+    @staticmethod
+    def status(upload_id):
+        meta = DocumentUploadService._load(upload_id)
+        return {
+            'upload_id': upload_id,
+            'offset': meta['offset'],
+            'size': meta['size'],
+            'chunk_size': Config.DOCUMENT_CHUNK_SIZE
+        }
+    
+    @staticmethod
+    @contextmanager
+    def _locked(upload_id):
+        """Una sola parte a la vez por subida, también entre procesos (archivo .lock)"""
+        _, _, lock_path = DocumentUploadService._paths(upload_id)
+        try:
+            if time.time() - os.path.getmtime(lock_path) > DocumentUploadService.LOCK_STALE_SECONDS:
+                os.remove(lock_path)
+        except OSError:
+            pass
+        
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise BlockingIOError('Ya se está recibiendo otra parte de esta subida')
+        os.close(fd)
+        
+        try:
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def append(upload_id, offset, stream, length):
+        """Agrega una parte leída de stream en la posición offset.
+        
+        Si offset no coincide con lo ya recibido se lanza OffsetMismatchError con el
+        offset correcto para que el cliente reanude. Lo escrito antes de un corte
+        queda guardado: el siguiente intento continúa desde el nuevo offset.
+        """
+        if length is None or length <= 0:
+            raise ValueError('La parte está vacía o no indica su tamaño (Content-Length)')
+        if length > Config.DOCUMENT_CHUNK_SIZE:
+            raise ValueError(f'Cada parte puede tener como máximo {Config.DOCUMENT_CHUNK_SIZE} bytes')
+        
+        with DocumentUploadService._locked(upload_id):
+            meta = DocumentUploadService._load(upload_id)
+            if offset != meta['offset']:
+                raise OffsetMismatchError(meta['offset'])
+            if offset + length > meta['size']:
+                raise ValueError('La parte excede el tamaño declarado del archivo')
+            
+            with DocumentUploadService._hashers_lock:
+                hashed_offset, digest = DocumentUploadService._hashers.pop(upload_id, (0, hashlib.sha256()))
+            if hashed_offset != offset:
+                digest = None
+            
+            part_path, _, _ = DocumentUploadService._paths(upload_id)
+            with open(part_path, 'ab') as part_file:
+                remaining = length
+                while remaining > 0:
+                    block = stream.read(min(DocumentUploadService.WRITE_BLOCK_SIZE, remaining))
+                    if not block:
+                        break
+                    part_file.write(block)
+                    if digest is not None:
+                        digest.update(block)
+                    remaining -= len(block)
+            
+            if digest is not None:
+                with DocumentUploadService._hashers_lock:
+                    DocumentUploadService._hashers[upload_id] = (offset + length - remaining, digest)
+        
+        return DocumentUploadService.status(upload_id)
+    
+    @staticmethod
+    def _content_hash(upload_id, part_path, size):
+        """SHA-256 calculado durante las partes o, si no está disponible, releyendo el archivo"""
+        with DocumentUploadService._hashers_lock:
+            hashed_offset, digest = DocumentUploadService._hashers.pop(upload_id, (None, None))
+        if digest is not None and hashed_offset == size:
+            return digest.hexdigest()
+        
+        digest = hashlib.sha256()
+        with open(part_path, 'rb') as part_file:
+            for block in iter(lambda: part_file.read(DocumentUploadService.WRITE_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def finalize(upload_id):
+        """Verifica que el archivo esté completo, lo mueve a uploads/ y lo asocia al artículo"""
+        with DocumentUploadService._locked(upload_id):
+            meta = DocumentUploadService._load(upload_id)
+            if meta['offset'] != meta['size']:
+                raise ValueError(f"La subida está incompleta ({meta['offset']} de {meta['size']} bytes)")
+            
+            part_path, meta_path, _ = DocumentUploadService._paths(upload_id)
+            with open(part_path, 'rb') as part_file:
+                if part_file.read(5) != b'%PDF-':
+                    raise ValueError('El archivo no es un PDF válido')
+            
+            content_hash = DocumentUploadService._content_hash(upload_id, part_path, meta['size'])
+            unique_filename = DocumentService._store_content(
+                part_path, content_hash, meta['size'], meta['article_id'], meta['doc_type']
+            )
+            os.remove(meta_path)
+        
+        return {
+            'success': True,
+            'message': f"Documento {meta['doc_type']} subido correctamente",
+            'filename': unique_filename,
+            'original_filename': meta['filename']
+        }
+    
+    @staticmethod
+    def cancel(upload_id):
+        with DocumentUploadService._hashers_lock:
+            DocumentUploadService._hashers.pop(upload_id, None)
+        for path in DocumentUploadService._paths(upload_id):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class JobProgress:
+    """Registra en trabajos el avance de un trabajo; se llama con las filas procesadas
+    y escribe en la base como mucho una vez cada JOB_PROGRESS_INTERVAL segundos"""
+    
+    def __init__(self, job_id, total=None):
+        self.job_id = job_id
+        self.total = total
+        self.processed = 0
+        self._reported_at = 0.0
+    
+    def __call__(self, processed, total=None):
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        
+        now = time.monotonic()
+        if now - self._reported_at < Config.JOB_PROGRESS_INTERVAL:
+            return
+        self._reported_at = now
+        self.flush()
+    
+    def flush(self):
+        try:
+            Job.update_progress(self.job_id, self.processed, self.total)
+        except Exception as e:
+            # El progreso es informativo: un fallo al registrarlo no detiene el trabajo
+            print(f"Error registrando el progreso del trabajo {self.job_id}: {e}")
+
+
+class JobService:
+    """Ejecuta en segundo plano las importaciones CSV y las exportaciones para no
+    ocupar un worker web mientras duran.
+    
+    Los trabajos corren en un pool de hilos del proceso que los recibe; su estado y
+    progreso se guardan en la tabla trabajos, así que cualquier proceso puede
+    informarlos, y los archivos generados quedan en disco hasta JOB_RESULT_TTL.
+    """
+    JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+    EXPORT_FORMATS = ('xlsx', 'csv')
+    
+    # Estados de la tabla trabajos tal como los expone la API
+    STATUS_NAMES = {
+        'pendiente': 'pending',
+        'en_curso': 'running',
+        'completado': 'completed',
+        'error': 'failed'
+    }
+    
+    # Segundos sin cambios tras los que el stream de eventos envía un comentario
+    # para que los proxies no cierren la conexión
+    EVENTS_KEEPALIVE = 15
+    
+    _executor = None
+    _executor_lock = threading.Lock()
+    
+    # Trabajos pendientes o en curso de este proceso, cuyos latidos envía _heartbeat
+    _active_jobs = set()
+    _active_lock = threading.Lock()
+    
+    @staticmethod
+    def get_result_folder():
+        return os.path.join(tempfile.gettempdir(), 'mylib-jobs')
+    
+    @staticmethod
+    def _get_executor():
+        if JobService._executor is None:
+            with JobService._executor_lock:
+                if JobService._executor is None:
+                    JobService._executor = ThreadPoolExecutor(
+                        max_workers=Config.JOB_WORKERS, thread_name_prefix='mylib-job'
+                    )
+                    threading.Thread(
+                        target=JobService._heartbeat, name='mylib-job-heartbeat', daemon=True
+                    ).start()
+        return JobService._executor
+    
+    @staticmethod
+    def _heartbeat():
+        """Renueva cada JOB_HEARTBEAT_INTERVAL los trabajos de este proceso, incluidos
+        los que esperan turno o no informan avances, para que fail_stale solo marque
+        los de procesos que terminaron"""
+        while True:
+            time.sleep(Config.JOB_HEARTBEAT_INTERVAL)
+            with JobService._active_lock:
+                job_ids = list(JobService._active_jobs)
+            if not job_ids:
+                continue
+            try:
+                Job.heartbeat(job_ids)
+            except Exception as e:
+                print(f"Error renovando los trabajos en curso: {e}")
+    
+    @staticmethod
+    def fail_interrupted():
+        """Al iniciar la aplicación: los trabajos pendientes o en curso que quedan son
+        de un proceso anterior (los trabajos corren en el proceso que los recibe) y
+        nadie los va a terminar"""
+        try:
+            count = Job.fail_stale(0)
+        except Exception as e:
+            print(f"Error marcando los trabajos interrumpidos: {e}")
+            return
+        if count:
+            print(f"{count} trabajo(s) de una ejecución anterior marcados como interrumpidos")
+    
+    @staticmethod
+    def evict_expired():
+        """Marca los trabajos interrumpidos y elimina los vencidos junto con sus archivos"""
+        Job.fail_stale(Config.JOB_STALE_SECONDS)
+        for path in Job.purge_finished(Config.JOB_RESULT_TTL):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def submit_import_csv(token, force_import=False):
+        """Encola la importación de una sesión de check-csv; la sesión se reclama al
+        encolar para que un segundo envío del mismo token no cree otro trabajo"""
+        ImportSessionService.claim(token)
+        try:
+            total = ImportSessionService.count_rows(token)
+            return JobService._submit('import_csv', {'token': token, 'force': force_import}, total)
+        except Exception:
+            ImportSessionService.release(token)
+            raise
+    
+    @staticmethod
+    def submit_export(bookmarks_only=False, export_format='xlsx'):
+        """Encola una exportación de todos los artículos o solo de los marcadores"""
+        if export_format not in JobService.EXPORT_FORMATS:
+            raise ValueError('Formato de exportación inválido')
+        
+        total = Article.count_for_export(bookmarks_only)
+        params = {'bookmarks': bookmarks_only, 'format': export_format}
+        return JobService._submit('export', params, total)
+    
+    @staticmethod
+    def _submit(kind, params, total=None):
+        JobService.evict_expired()
+        
+        job_id = uuid.uuid4().hex
+        row = Job.create(job_id, kind, params, total)
+        executor = JobService._get_executor()
+        with JobService._active_lock:
+            JobService._active_jobs.add(job_id)
+        executor.submit(JobService._run, job_id, kind, params, total)
+        return JobService._to_status(Job.to_dict(row))
+    
+    @staticmethod
+    def _run(job_id, kind, params, total):
+        """Cuerpo de cada trabajo en el pool: el resultado o el error quedan en trabajos"""
+        result_path = None
+        try:
+            if not Job.start(job_id):
+                return
+            
+            started_at = time.monotonic()
+            progress = JobProgress(job_id, total)
+            if kind == 'import_csv':
+                result = CSVService.import_claimed_session(params['token'], params['force'], progress=progress)
+            else:
+                result_path = JobService._result_path(job_id, params['format'])
+                result = JobService._export(params['bookmarks'], params['format'], result_path, progress)
+            
+            progress.flush()
+            if not Job.complete(job_id, result, result_path):
+                # Se dio por interrumpido mientras corría: el resultado ya no se publica
+                if result_path and os.path.exists(result_path):
+                    os.remove(result_path)
+                print(f"Trabajo {job_id} ({kind}) terminado después de marcarse como interrumpido")
+                return
+            
+            # Rendimiento en el log para detectar regresiones entre versiones
+            elapsed = time.monotonic() - started_at
+            print(f"Trabajo {job_id} ({kind}) completado: {progress.processed} filas en {elapsed:.1f} s "
+                  f"({progress.processed / elapsed if elapsed > 0 else 0:.0f} filas/s)")
+        except Exception as e:
+            if result_path and os.path.exists(result_path):
+                os.remove(result_path)
+            try:
+                Job.fail(job_id, str(e))
+            except Exception as fail_error:
+                print(f"Error registrando el fallo del trabajo {job_id}: {fail_error}")
+        finally:
+            with JobService._active_lock:
+                JobService._active_jobs.discard(job_id)
+    
+    @staticmethod
+    def _result_path(job_id, extension):
+        return os.path.join(JobService.get_result_folder(), f'{job_id}.{extension}')
+    
+    @staticmethod
+    def _export(bookmarks_only, export_format, result_path, progress):
+        """Genera la exportación en result_path, reutilizando el cache de exportaciones
+        Excel cuando los datos no cambiaron"""
+        os.makedirs(JobService.get_result_folder(), exist_ok=True)
+        kind = 'matriz-marcadores' if bookmarks_only else 'matriz-analisis'
+        
+        if export_format == 'csv':
+            with open(result_path, 'wb') as result_file:
+                for block in CSVService.iter_export_csv(bookmarks_only, progress=progress):
+                    result_file.write(block)
+        else:
+            # La versión se lee antes que los datos, como en las exportaciones síncronas
+            version = DataVersion.get('articulos')
+            cached_path = ExportCacheService.get(kind, version, 'xlsx')
+            copied = False
+            if cached_path:
+                try:
+                    shutil.copyfile(cached_path, result_path)
+                    copied = True
+                except OSError:
+                    # Otro proceso lo evictó entre get y la copia
+                    pass
+            
+            if copied:
+                progress(progress.total or 0)
+            else:
+                build_export = (ExcelService.create_excel_export_bookmarks if bookmarks_only
+                                else ExcelService.create_excel_export)
+                export_file, _ = build_export(progress)
+                with export_file, open(result_path, 'wb') as result_file:
+                    shutil.copyfileobj(export_file, result_file)
+                with open(result_path, 'rb') as result_file:
+                    ExportCacheService.store(kind, version, 'xlsx', result_file)
+        
+        return {
+            'filename': f'{kind}-{ExcelService._get_local_timestamp()}.{export_format}',
+            'format': export_format,
+            'rows': progress.processed
+        }
+    
+    @staticmethod
+    def _load(job_id):
+        if not job_id or not JobService.JOB_ID_PATTERN.match(job_id):
+            raise ValueError('Identificador de trabajo inválido')
+        
+        job = Job.to_dict(Job.get(job_id))
+        if job is None:
+            raise FileNotFoundError('El trabajo no existe o ya expiró')
+        
+        # Sin latidos de su proceso el trabajo nunca terminaría: el cliente que lo
+        # espera recibe el error en vez de esperar hasta que otro envío lo marque
+        if job['estado'] in ('pendiente', 'en_curso') and Job.fail_stale(Config.JOB_STALE_SECONDS, job_id):
+            job = Job.to_dict(Job.get(job_id))
+        return job
+    
+    @staticmethod
+    def _to_status(job):
+        progress = None
+        if job['total']:
+            progress = min(100, round(job['procesados'] * 100 / job['total'], 1))
+        
+        # Rendimiento promedio desde que empezó y tiempo restante estimado con ese ritmo
+        elapsed = job['segundos']
+        rows_per_second = None
+        eta_seconds = None
+        if elapsed and elapsed > 0:
+            rows_per_second = round(job['procesados'] / elapsed, 1)
+            if job['estado'] == 'en_curso' and rows_per_second > 0 and job['total']:
+                eta_seconds = round(max(0, job['total'] - job['procesados']) / rows_per_second, 1)
+        
+        return {
+            'job_id': job['id'],
+            'type': job['tipo'],
+            'status': JobService.STATUS_NAMES[job['estado']],
+            'processed': job['procesados'],
+            'total': job['total'],
+            'progress': progress,
+            'elapsed_seconds': round(elapsed, 1) if elapsed is not None else None,
+            'rows_per_second': rows_per_second,
+            'eta_seconds': eta_seconds,
+            'result': job['resultado'],
+            'has_file': job['archivo_resultado'] is not None,
+            'error': job['error'],
+            'created_at': job['creado_en'],
+            'started_at': job['iniciado_en'],
+            'updated_at': job['actualizado_en'],
+            'finished_at': job['finalizado_en']
+        }
+    
+    @staticmethod
+    def status(job_id):
+        return JobService._to_status(JobService._load(job_id))
+    
+    @staticmethod
+    def get_result(job_id):
+        """Retorna (estado, path del archivo generado o None)"""
+        job = JobService._load(job_id)
+        return JobService._to_status(job), job['archivo_resultado']
+    
+    @staticmethod
+    def _sse(event, data):
+        return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+    
+    @staticmethod
+    def iter_events(job_id):
+        """Stream SSE del avance: un evento 'progress' cada vez que el estado cambia y
+        un evento 'done' al terminar el trabajo.
+        
+        La conexión se cierra tras JOB_EVENTS_MAX_DURATION para no retener un worker
+        indefinidamente; EventSource se reconecta solo y recibe el estado actual.
+        """
+        deadline = time.monotonic() + Config.JOB_EVENTS_MAX_DURATION
+        last_sent = None
+        last_sent_at = time.monotonic()
+        
+        # Tiempo de reconexión sugerido al navegador (milisegundos)
+        yield f'retry: {int(Config.JOB_EVENTS_INTERVAL * 1000)}\n\n'
+        
+        while True:
+            job = JobService.status(job_id)
+            if job['status'] in ('completed', 'failed'):
+                yield JobService._sse('done', job)
+                return
+            
+            now = time.monotonic()
+            snapshot = (job['status'], job['processed'], job['total'])
+            if snapshot != last_sent:
+                yield JobService._sse('progress', job)
+                last_sent = snapshot
+                last_sent_at = now
+            elif now - last_sent_at >= JobService.EVENTS_KEEPALIVE:
+                yield ': keepalive\n\n'
+                last_sent_at = now
+            
+            if now >= deadline:
+                return
+            time.sleep(Config.JOB_EVENTS_INTERVAL)
@@ -0,0 +1,146 @@
+import statistics
+import sys
+import time
+
+from app import create_app
+from app.database import DatabaseManager
+from app.models import Article
+
+REPETICIONES = 10
+
+def medir(nombre, funcion):
+    """Ejecuta la función varias veces y devuelve la mediana en segundos"""
+    funcion()  # Calentamiento (conexión del pool, caches de PostgreSQL)
+
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    mediana = statistics.median(tiempos)
+    print(f"{nombre:<45} {mediana * 1000:9.1f} ms  ({len(resultado) / 1024:.0f} KB)")
+    return mediana
+
+def articulo_original(row):
+    """Copia del Article.to_dict original: un literal de diccionario con row[i]"""
+    if not row:
+        return None
+
+    return {
+        'id': row[0],
+        'autor': row[1],
+        'nombre_revista': row[2],
+        'quartil_revista': row[3],
+        'anio': row[4],
+        'doi': row[5],
+        'titulo_original': row[6],
+        'titulo_espanol': row[7],
+        'base_datos': row[8],
+        'abstract': row[9],
+        'resumen': row[10],
+        'keywords_autor': row[11],
+        'keywords_indexed': row[12],
+        'problema_articulo': row[13],
+        'datos_estadisticos': row[14],
+        'pregunta_investigacion': row[15],
+        'objetivo_original': row[16],
+        'objetivo_espanol': row[17],
+        'objetivo_reescrito': row[18],
+        'justificacion': row[19],
+        'hipotesis': row[20],
+        'tipo_investigacion': row[21],
+        'estudios_previos': row[22],
+        'poblacion_muestra_datos': row[23],
+        'recoleccion_datos': row[24],
+        'resultados': row[25],
+        'conclusiones': row[26],
+        'discusion': row[27],
+        'trabajos_futuros': row[28],
+        'enlace': row[29],
+        'eid': row[30],
+        'seleccionado': row[31],
+        'documentos': []  # Lista vacía por defecto para compatibilidad
+    }
+
+def documento_original(row):
+    """Copia del ArticleDocument.to_dict original"""
+    if not row:
+        return None
+
+    return {
+        'id': row[0],
+        'articulo_id': row[1],
+        'nombre_archivo_original': row[2],
+        'nombre_archivo_traducido': row[3]
+    }
+
+def con_dos_consultas():
+    """Camino original, copiado tal cual del Article.get_all_with_documents anterior
+    para que la comparación no dependa del código actual: SELECT *, documentos con
+    IN (...) y unión por artículo en Python. SELECT * trae además las columnas que
+    agregaron las migraciones (version, version_creacion, actualizado_en), que el
+    diccionario no usa."""
+    articles = DatabaseManager.execute_query('SELECT * FROM articulos ORDER BY id DESC', fetch_all=True)
+
+    if not articles:
+        return []
+
+    article_ids = [str(article[0]) for article in articles]
+    placeholders = ','.join(['%s'] * len(article_ids))
+    docs_query = f'''
+        SELECT id, articulo_id, nombre_archivo_original, nombre_archivo_traducido 
+        FROM articulo_documentos 
+        WHERE articulo_id IN ({placeholders})
+    '''
+    documents = DatabaseManager.execute_query(docs_query, article_ids, fetch_all=True)
+
+    docs_by_article = {}
+    for doc in documents:
+        article_id = doc[1]
+        if article_id not in docs_by_article:
+            docs_by_article[article_id] = []
+        docs_by_article[article_id].append(documento_original(doc))
+
+    result = []
+    for article in articles:
+        article_dict = articulo_original(article)
+        article_dict['documentos'] = docs_by_article.get(article[0], [])
+        result.append(article_dict)
+
+    return result
+
+def main():
+    app = create_app()
+
+    with app.app_context():
+        total = len(Article.get_all())
+        print(f"Serialización de /api/articles con {total} artículos (mediana de {REPETICIONES} ejecuciones)\n")
+
+        # Camino original: dos consultas, documentos unidos en Python -> jsonify
+        anterior = medir(
+            'dos consultas + jsonify (original)',
+            lambda: app.json.dumps(con_dos_consultas())
+        )
+
+        # Una consulta (LEFT JOIN LATERAL), diccionarios en Python -> jsonify
+        lateral = medir(
+            'get_all_with_documents() + jsonify',
+            lambda: app.json.dumps(Article.get_all_with_documents())
+        )
+
+        # Camino rápido: PostgreSQL arma el arreglo JSON completo
+        rapido = medir(
+            'get_all_json() (json_agg en PostgreSQL)',
+            Article.get_all_json
+        )
+
+        print(f"\nMejora respecto del original: {anterior / lateral:.1f}x (una consulta), "
+              f"{anterior / rapido:.1f}x (JSON en PostgreSQL)")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Error ejecutando el benchmark: {e}")
+        sys.exit(1)
@@ -142,6 +142,10 @@ def insert_column_data(cursor, rows):
         
         print(f"Total de filas insertadas: {inserted_count}")
         
+        # Import diferido: Config lee el .env al importarse y initialize.py puede crearlo después
+        from app.models import ColumnMetadata
+        ColumnMetadata.invalidate_cache()
+        
     except Exception as e:
         print(f"Error insertando datos: {e}")
         raise
@@ -5,6 +5,7 @@ import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from dotenv import load_dotenv
 import columns2db
+from migrate import MigrationRunner
 from contextlib import contextmanager
 
 class ProjectInitializer:
@@ -66,6 +67,9 @@ class ProjectInitializer:
             if not self._validate_and_setup_schema(verbose):
                 return self._print_error_and_exit_instructions("Error en la configuración del esquema de base de datos.")
             
+            if not self._apply_migrations(verbose):
+                return self._print_error_and_exit_instructions("Error aplicando las migraciones de base de datos.")
+            
             if not self._validate_and_setup_data(verbose):
                 return self._print_error_and_exit_instructions("Error en la configuración de datos iniciales.")
             
@@ -256,6 +260,20 @@ class ProjectInitializer:
         
         return self._execute_db_operation("creando esquema", create_schema)
     
+    def _apply_migrations(self, verbose=False):
+        """Aplica las migraciones pendientes de migrations/ para que bases creadas con
+        un esquema anterior reciban los índices, tablas y triggers nuevos"""
+        if verbose:
+            print("Verificando migraciones de base de datos...")
+        
+        def apply_migrations():
+            applied = MigrationRunner().migrate(verbose)
+            if verbose:
+                print(f"Migraciones aplicadas: {len(applied)}" if applied else "Base de datos al día")
+            return True
+        
+        return self._execute_db_operation("aplicando migraciones", apply_migrations)
+    
     def _validate_and_setup_data(self, verbose=False):
         if verbose:
             print("Verificando datos en metadata_columnas...")
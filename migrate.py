@@ -0,0 +1,249 @@
+import hashlib
+import os
+import re
+import sys
+import psycopg2
+from dotenv import load_dotenv
+
+class MigrationRunner:
+    """Aplica en orden los scripts de migrations/ que aún no figuran en schema_migraciones.
+
+    Cada script se ejecuta en su propia transacción junto con su registro, así que
+    un fallo no deja la migración a medias. Los scripts que empiezan con la marca
+    '-- migracion: sin-transaccion' se ejecutan sentencia por sentencia en autocommit,
+    como exige CREATE INDEX CONCURRENTLY; deben ser idempotentes (IF NOT EXISTS)
+    porque un fallo puede dejarlos aplicados en parte. Un CREATE INDEX CONCURRENTLY
+    fallido deja el índice marcado INVALID y IF NOT EXISTS lo daría por creado: el
+    runner lo elimina y lo vuelve a construir, y no registra la migración mientras
+    alguno de sus índices siga inválido. Como no admiten bloques DO, una sentencia
+    precedida por '-- requiere-extension: <nombre>' se omite si la extensión falta.
+    """
+
+    FILENAME_PATTERN = re.compile(r'^(\d+)_(\w+)\.sql$')
+    CONCURRENT_INDEX_PATTERN = re.compile(
+        r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.IGNORECASE
+    )
+    NO_TRANSACTION_MARK = '-- migracion: sin-transaccion'
+    EXTENSION_GUARD_PATTERN = re.compile(r'^\s*--\s*requiere-extension:\s*(\w+)\s*$', re.MULTILINE)
+
+    # Identificador del advisory lock: evita que dos procesos migren a la vez
+    LOCK_ID = 4350
+
+    # Las migraciones transaccionales fallan en lugar de quedarse esperando (y
+    # bloqueando las consultas de la aplicación) si no obtienen sus locks a tiempo
+    LOCK_TIMEOUT = '10s'
+
+    def __init__(self, migrations_dir='migrations'):
+        self.migrations_dir = migrations_dir
+
+    def _connect(self):
+        return psycopg2.connect(
+            host=os.getenv('PG_HOST'),
+            port=os.getenv('PG_PORT'),
+            user=os.getenv('PG_USER'),
+            password=os.getenv('PG_PASSWORD'),
+            database=os.getenv('PG_DATABASE')
+        )
+
+    def discover(self):
+        """Scripts de migración ordenados por versión: lista de (version, nombre, ruta)"""
+        if not os.path.isdir(self.migrations_dir):
+            raise FileNotFoundError(f"No se encontró el directorio {self.migrations_dir}")
+
+        migrations = {}
+        for filename in os.listdir(self.migrations_dir):
+            match = self.FILENAME_PATTERN.match(filename)
+            if not match:
+                continue
+
+            version = int(match.group(1))
+            if version in migrations:
+                raise ValueError(f"Versión de migración duplicada: {filename}")
+            migrations[version] = (version, match.group(2), os.path.join(self.migrations_dir, filename))
+
+        return [migrations[version] for version in sorted(migrations)]
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            sql = file.read()
+        return sql, hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _split_statements(sql):
+        """Separa un script sin transacción en sentencias (una por ';' al final de línea).
+        Estos scripts no pueden contener bloques DO ni funciones; en su lugar, un
+        comentario '-- requiere-extension: <nombre>' antes de una sentencia hace que
+        se omita si la extensión no está instalada.
+
+        Devuelve una lista de (sentencia, extensión requerida o None).
+        """
+        statements = []
+        for chunk in re.split(r';\s*$', sql, flags=re.MULTILINE):
+            lines = [line for line in chunk.splitlines() if line.strip() and not line.strip().startswith('--')]
+            if lines:
+                guard = MigrationRunner.EXTENSION_GUARD_PATTERN.search(chunk)
+                statements.append(('\n'.join(lines), guard.group(1) if guard else None))
+        return statements
+
+    def _ensure_table(self, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migraciones (
+                version INTEGER PRIMARY KEY,
+                nombre varchar(200) NOT NULL,
+                checksum varchar(64) NOT NULL,
+                aplicada_en TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+
+    def _applied(self, cursor):
+        cursor.execute("SELECT version, checksum FROM schema_migraciones")
+        return dict(cursor.fetchall())
+
+    def pending(self):
+        """Migraciones aún no aplicadas en la base de datos"""
+        conn = self._connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                self._ensure_table(cursor)
+                applied = self._applied(cursor)
+            return [migration for migration in self.discover() if migration[0] not in applied]
+        finally:
+            conn.close()
+
+    def migrate(self, verbose=False):
+        """Aplica las migraciones pendientes y devuelve los nombres de las aplicadas"""
+        migrations = self.discover()
+        applied_now = []
+
+        conn = self._connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_lock(%s)", (self.LOCK_ID,))
+                try:
+                    self._ensure_table(cursor)
+                    applied = self._applied(cursor)
+
+                    for version, name, path in migrations:
+                        sql, checksum = self._read(path)
+
+                        if version in applied:
+                            if applied[version] != checksum:
+                                print(f"Advertencia: la migración {version:04d}_{name} cambió después de aplicarse")
+                            continue
+
+                        if verbose:
+                            print(f"Aplicando migración {version:04d}_{name}...")
+
+                        if sql.lstrip().startswith(self.NO_TRANSACTION_MARK):
+                            self._apply_without_transaction(conn, version, name, sql, checksum)
+                        else:
+                            self._apply_in_transaction(conn, version, name, sql, checksum)
+                        applied_now.append(f"{version:04d}_{name}")
+                finally:
+                    conn.autocommit = True
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", (self.LOCK_ID,))
+        finally:
+            conn.close()
+
+        return applied_now
+
+    def _record(self, cursor, version, name, checksum):
+        cursor.execute(
+            "INSERT INTO schema_migraciones (version, nombre, checksum) VALUES (%s, %s, %s)",
+            (version, name, checksum)
+        )
+
+    def _apply_in_transaction(self, conn, version, name, sql, checksum):
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = %s", (self.LOCK_TIMEOUT,))
+                cursor.execute(sql)
+                self._record(cursor, version, name, checksum)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+
+    def _apply_without_transaction(self, conn, version, name, sql, checksum):
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            indexes = []
+            for statement, extension in self._split_statements(sql):
+                if extension and not self._has_extension(cursor, extension):
+                    print(f"Extensión {extension} no instalada: se omite una sentencia de {version:04d}_{name}")
+                    continue
+
+                match = self.CONCURRENT_INDEX_PATTERN.search(statement)
+                if not match:
+                    cursor.execute(statement)
+                    continue
+
+                index = match.group(1).lower()
+                indexes.append(index)
+                # Restos de un intento anterior fallido: IF NOT EXISTS no los reconstruiría
+                self._drop_if_invalid(cursor, index)
+                try:
+                    cursor.execute(statement)
+                except Exception:
+                    self._drop_if_invalid(cursor, index)
+                    raise
+
+            invalid = [index for index in indexes if self._is_invalid_index(cursor, index)]
+            if invalid:
+                raise RuntimeError(
+                    f"La migración {version:04d}_{name} dejó índices inválidos: {', '.join(invalid)}"
+                )
+            self._record(cursor, version, name, checksum)
+
+    @staticmethod
+    def _has_extension(cursor, extension):
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = %s)", (extension,))
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def _is_invalid_index(cursor, index):
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_class c
+                JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE c.relname = %s AND pg_table_is_visible(c.oid) AND NOT i.indisvalid
+            )
+        """, (index,))
+        return cursor.fetchone()[0]
+
+    def _drop_if_invalid(self, cursor, index):
+        if self._is_invalid_index(cursor, index):
+            print(f"Eliminando el índice inválido {index} para volver a crearlo")
+            # El nombre viene de CONCURRENT_INDEX_PATTERN (solo caracteres \w)
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+
+
+def run_migrations(verbose=False):
+    runner = MigrationRunner()
+    return runner.migrate(verbose)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    try:
+        if '--status' in sys.argv:
+            pending = MigrationRunner().pending()
+            if not pending:
+                print("No hay migraciones pendientes")
+            for version, name, _ in pending:
+                print(f"Pendiente: {version:04d}_{name}")
+            sys.exit(0)
+
+        applied = run_migrations(verbose=True)
+        print(f"Migraciones aplicadas: {len(applied)}")
+        sys.exit(0)
+    except Exception as e:
+        print(f"Error aplicando migraciones: {e}")
+        sys.exit(1)
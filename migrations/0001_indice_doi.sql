@@ -0,0 +1,3 @@
+-- migracion: sin-transaccion
+-- Búsqueda de duplicados por DOI sin distinguir mayúsculas (importación CSV)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articulos_doi_lower ON articulos (lower(doi)) WHERE doi <> '';
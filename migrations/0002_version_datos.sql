@@ -0,0 +1,36 @@
+-- Contador de cambios por tabla (cache de exportaciones)
+CREATE TABLE IF NOT EXISTS version_datos (
+    tabla varchar(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION incrementar_version_datos() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO version_datos (tabla, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (tabla) DO UPDATE SET version = version_datos.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_articulos_version') THEN
+        CREATE TRIGGER trg_articulos_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON articulos
+            FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_datos();
+    END IF;
+    
+    -- Versiones usadas por los ETag de las lecturas (GET condicional)
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_articulo_documentos_version') THEN
+        CREATE TRIGGER trg_articulo_documentos_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON articulo_documentos
+            FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_datos();
+    END IF;
+    
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_metadata_columnas_version') THEN
+        CREATE TRIGGER trg_metadata_columnas_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON metadata_columnas
+            FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_datos();
+    END IF;
+END;
+$$;
@@ -0,0 +1,15 @@
+-- Búsqueda de texto completo: títulos y keywords pesan más que abstract/resumen.
+-- El tsvector no se guarda en una columna (agregar una columna generada reescribe
+-- articulos con un lock exclusivo): Article.SEARCH_VECTOR lo calcula y el índice
+-- GIN sobre esa misma expresión se construye sin bloquear en 0005.
+
+-- Trigramas para búsqueda parcial por autor (requiere la extensión pg_trgm;
+-- si no se puede instalar, por permisos o porque el servidor no trae contrib,
+-- la búsqueda funciona igual con ILIKE y sin índice)
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm no disponible (%): se omite el índice de trigramas de autor', SQLERRM;
+END;
+$$;
@@ -0,0 +1,86 @@
+-- Versión por fila para la sincronización incremental (/api/articles/changes)
+-- (requiere PostgreSQL 13+). Cada fila de articulos y articulo_documentos, y cada
+-- eliminación, guarda el id de la transacción que la escribió; la versión que se
+-- entrega al cliente es el xmin de la instantánea (Article.CHANGE_VERSION_QUERY).
+-- Un número de secuencia no serviría: se asigna al escribir y no al confirmar, así
+-- que el cambio de una transacción aún abierta quedaría por debajo de una versión
+-- ya entregada y se perdería.
+ALTER TABLE articulos ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE articulos ADD COLUMN IF NOT EXISTS version_creacion BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE articulos ADD COLUMN IF NOT EXISTS actualizado_en TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE articulo_documentos ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE articulo_documentos ADD COLUMN IF NOT EXISTS actualizado_en TIMESTAMPTZ NOT NULL DEFAULT now();
+
+-- Los índices por version de estas dos tablas se construyen sin bloquear en 0005
+
+-- Filas eliminadas (el cliente necesita saber qué quitar de su copia)
+CREATE TABLE IF NOT EXISTS registro_eliminaciones (
+    id BIGSERIAL PRIMARY KEY,
+    tabla varchar(100) NOT NULL,
+    registro_id INTEGER NOT NULL,
+    articulo_id INTEGER,
+    version BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+    eliminado_en TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_registro_eliminaciones_version ON registro_eliminaciones (version);
+CREATE INDEX IF NOT EXISTS idx_registro_eliminaciones_eliminado_en ON registro_eliminaciones (eliminado_en);
+
+-- Versión mínima que puede pedir un cliente: Article.prune_deletions la sube al
+-- borrar eliminaciones antiguas; una versión menor exige recargar el listado
+CREATE TABLE IF NOT EXISTS cambios_horizonte (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    version BIGINT NOT NULL
+);
+
+INSERT INTO cambios_horizonte (version) VALUES (0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION marcar_version_fila() RETURNS trigger AS $$
+BEGIN
+    NEW.version := pg_current_xact_id()::text::bigint;
+    NEW.actualizado_en := now();
+    IF TG_OP = 'INSERT' AND TG_TABLE_NAME = 'articulos' THEN
+        NEW.version_creacion := NEW.version;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION registrar_eliminacion() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'articulos' THEN
+        INSERT INTO registro_eliminaciones (tabla, registro_id, articulo_id) VALUES (TG_TABLE_NAME, OLD.id, OLD.id);
+    ELSE
+        INSERT INTO registro_eliminaciones (tabla, registro_id, articulo_id) VALUES (TG_TABLE_NAME, OLD.id, OLD.articulo_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_articulos_version_fila') THEN
+        CREATE TRIGGER trg_articulos_version_fila
+            BEFORE INSERT OR UPDATE ON articulos
+            FOR EACH ROW EXECUTE FUNCTION marcar_version_fila();
+    END IF;
+    
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_articulo_documentos_version_fila') THEN
+        CREATE TRIGGER trg_articulo_documentos_version_fila
+            BEFORE INSERT OR UPDATE ON articulo_documentos
+            FOR EACH ROW EXECUTE FUNCTION marcar_version_fila();
+    END IF;
+    
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_articulos_eliminacion') THEN
+        CREATE TRIGGER trg_articulos_eliminacion
+            AFTER DELETE ON articulos
+            FOR EACH ROW EXECUTE FUNCTION registrar_eliminacion();
+    END IF;
+    
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_articulo_documentos_eliminacion') THEN
+        CREATE TRIGGER trg_articulo_documentos_eliminacion
+            AFTER DELETE ON articulo_documentos
+            FOR EACH ROW EXECUTE FUNCTION registrar_eliminacion();
+    END IF;
+END;
+$$;
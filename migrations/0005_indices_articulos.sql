@@ -0,0 +1,29 @@
+-- migracion: sin-transaccion
+-- Índices sobre articulos y articulo_documentos. CONCURRENTLY no bloquea las
+-- escrituras mientras se construyen en tablas grandes. Si uno falla a medias queda
+-- INVALID: el runner lo elimina y lo vuelve a construir en el siguiente intento.
+
+-- Documentos por artículo: la FK no crea índice y todas las consultas de
+-- documentos (incluido el JOIN LATERAL de los listados) filtran por articulo_id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articulo_documentos_articulo_id ON articulo_documentos (articulo_id);
+
+-- Marcadores: índice parcial solo con los artículos seleccionados (ordenados por id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articulos_seleccionado ON articulos (id) WHERE seleccionado;
+
+-- Búsqueda de texto completo (0003). La expresión debe coincidir exactamente con
+-- Article.SEARCH_VECTOR para que el planificador use el índice.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articulos_busqueda ON articulos USING gin ((
+    setweight(to_tsvector('english', coalesce(titulo_original, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(titulo_espanol, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(keywords_autor, '') || ' ' || coalesce(keywords_indexed, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(abstract, '')), 'C') ||
+    setweight(to_tsvector('spanish', coalesce(resumen, '')), 'C')
+));
+
+-- Trigramas de autor: solo si 0003 pudo instalar pg_trgm
+-- requiere-extension: pg_trgm
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articulos_autor_trgm ON articulos USING gin (autor gin_trgm_ops);
+
+-- Sincronización incremental (0004)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articulos_version ON articulos (version);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_articulo_documentos_version ON articulo_documentos (version);
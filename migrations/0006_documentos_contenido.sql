@@ -0,0 +1,45 @@
+-- Almacenamiento por contenido: cada PDF se guarda una sola vez como <sha256>.pdf.
+-- referencias cuenta las columnas de articulo_documentos que apuntan al archivo y
+-- la mantiene el trigger; los archivos sin referencias se eliminan pasado un margen
+-- (ultimo_uso) para no borrar uno que se está volviendo a subir en ese momento.
+CREATE TABLE IF NOT EXISTS documentos_contenido (
+    hash varchar(64) PRIMARY KEY,
+    nombre_archivo varchar(100) NOT NULL UNIQUE,
+    tamano BIGINT NOT NULL,
+    referencias INTEGER NOT NULL DEFAULT 0,
+    ultimo_uso TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_documentos_contenido_sin_referencias
+    ON documentos_contenido (ultimo_uso) WHERE referencias <= 0;
+
+CREATE OR REPLACE FUNCTION contar_referencias_documento() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE documentos_contenido SET referencias = referencias - 1, ultimo_uso = now()
+        WHERE nombre_archivo = OLD.nombre_archivo_original;
+        UPDATE documentos_contenido SET referencias = referencias - 1, ultimo_uso = now()
+        WHERE nombre_archivo = OLD.nombre_archivo_traducido;
+    END IF;
+    
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE documentos_contenido SET referencias = referencias + 1, ultimo_uso = now()
+        WHERE nombre_archivo = NEW.nombre_archivo_original;
+        UPDATE documentos_contenido SET referencias = referencias + 1, ultimo_uso = now()
+        WHERE nombre_archivo = NEW.nombre_archivo_traducido;
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_articulo_documentos_referencias') THEN
+        CREATE TRIGGER trg_articulo_documentos_referencias
+            AFTER INSERT OR UPDATE OF nombre_archivo_original, nombre_archivo_traducido OR DELETE
+            ON articulo_documentos
+            FOR EACH ROW EXECUTE FUNCTION contar_referencias_documento();
+    END IF;
+END;
+$$;
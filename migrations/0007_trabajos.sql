@@ -0,0 +1,25 @@
+-- Trabajos en segundo plano (importaciones CSV y exportaciones). El estado y el
+-- progreso se guardan aquí para que cualquier proceso del servidor pueda informarlos;
+-- actualizado_en se renueva con cada avance y permite detectar trabajos interrumpidos.
+CREATE TABLE IF NOT EXISTS trabajos (
+    id varchar(32) PRIMARY KEY,
+    tipo varchar(50) NOT NULL,
+    estado varchar(20) NOT NULL DEFAULT 'pendiente'
+        CHECK (estado IN ('pendiente', 'en_curso', 'completado', 'error')),
+    parametros JSONB NOT NULL DEFAULT '{}',
+    procesados BIGINT NOT NULL DEFAULT 0,
+    total BIGINT,
+    resultado JSONB,
+    archivo_resultado TEXT,
+    error TEXT,
+    creado_en TIMESTAMPTZ NOT NULL DEFAULT now(),
+    iniciado_en TIMESTAMPTZ,
+    actualizado_en TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finalizado_en TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_trabajos_finalizado_en
+    ON trabajos (finalizado_en) WHERE finalizado_en IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_trabajos_activos
+    ON trabajos (actualizado_en) WHERE estado IN ('pendiente', 'en_curso');
@@ -0,0 +1,42 @@
+-- version_datos repartida en ranuras. Antes cada sentencia sobre una tabla
+-- actualizaba la misma fila y la dejaba bloqueada hasta el commit, así que los
+-- escritores quedaban en fila (una importación larga detenía cada PATCH). Ahora
+-- cada transacción toma una ranura que nadie tiene bloqueada (SKIP LOCKED) y la
+-- reutiliza en sus siguientes sentencias. La versión de una tabla es la suma de
+-- sus ranuras: solo cambia con lo confirmado y crece con cada commit.
+ALTER TABLE version_datos ADD COLUMN IF NOT EXISTS slot INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE version_datos DROP CONSTRAINT version_datos_pkey;
+ALTER TABLE version_datos ADD PRIMARY KEY (tabla, slot);
+
+INSERT INTO version_datos (tabla, slot, version)
+SELECT tablas.tabla, ranuras.slot, 0
+FROM (VALUES ('articulos'), ('articulo_documentos'), ('metadata_columnas')) AS tablas (tabla),
+     generate_series(0, 15) AS ranuras (slot)
+ON CONFLICT (tabla, slot) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION incrementar_version_datos() RETURNS trigger AS $$
+DECLARE
+    -- Ranura ya usada por esta transacción (set_config local se descarta al terminar)
+    setting text := 'mylib.ranura_' || TG_TABLE_NAME;
+    ranura integer := nullif(current_setting(setting, true), '')::integer;
+BEGIN
+    IF ranura IS NULL THEN
+        SELECT slot INTO ranura FROM version_datos
+        WHERE tabla = TG_TABLE_NAME
+        ORDER BY random()
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED;
+        
+        -- Todas ocupadas (o tabla sin ranuras): esperar por una al azar
+        IF ranura IS NULL THEN
+            ranura := floor(random() * 16)::integer;
+        END IF;
+        PERFORM set_config(setting, ranura::text, true);
+    END IF;
+    
+    INSERT INTO version_datos (tabla, slot, version) VALUES (TG_TABLE_NAME, ranura, 1)
+    ON CONFLICT (tabla, slot) DO UPDATE SET version = version_datos.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
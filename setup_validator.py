@@ -4,6 +4,7 @@ import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from dotenv import load_dotenv
 import columns2db
+from migrate import MigrationRunner
 
 class SetupValidator:
     def __init__(self):
@@ -29,6 +30,9 @@ class SetupValidator:
             if not self._validate_and_setup_schema():
                 return False
             
+            if not self._apply_migrations():
+                return False
+            
             if not self._validate_and_setup_data():
                 return False
             
@@ -185,6 +189,18 @@ class SetupValidator:
             print(f"Error creando esquema: {e}")
             return False
     
+    def _apply_migrations(self):
+        print("Aplicando migraciones de base de datos...")
+        
+        try:
+            applied = MigrationRunner().migrate(verbose=True)
+            print(f"Migraciones aplicadas: {len(applied)}" if applied else "Base de datos al día")
+            return True
+            
+        except Exception as e:
+            print(f"Error aplicando migraciones: {e}")
+            return False
+    
     def _validate_and_setup_data(self):
         print("Validando datos en metadata_columnas...")
         
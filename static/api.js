@@ -1,9 +1,40 @@
-import { setAllArticles, setReadonlyFields, setColumnMetadata, allArticles, filteredArticles, setFilteredArticles } from './config.js';
+import { setAllArticles, setReadonlyFields, setColumnMetadata, allArticles, filteredArticles, setFilteredArticles, setTotalArticles, currentPage, itemsPerPage, visibleColumns, setCurrentPage } from './config.js';
 import { renderTable, downloadExcelFile } from './table.js';
 import { renderDocumentSections } from './documents.js';
 import { showDuplicateConfirmation, showMessage, showModalMessage, clearModalMessage, closeModal } from './modals.js';
 import { setFieldValue, configureReadonlyFields, getFieldValue, cleanPastedText, updateCharacterCounter, addCharacterCounters, addPasteEventListeners, autoResizeTextarea } from './utils.js';
 
+// Token de la sesión de importación creada por /api/check-csv
+let importToken = null;
+
+// Cursor (id del último artículo de la página anterior) con el que se pide cada página;
+// permite avanzar con paginación keyset en lugar de OFFSET. Depende de los filtros.
+const pageCursors = new Map();
+
+// Versión de los datos de la página cargada, para pedir solo los cambios a /api/articles/changes
+let changesVersion = null;
+
+// Artículo abierto en el modal de edición, tal como lo devolvió el servidor
+let editingArticle = null;
+
+// Campos que necesita la tabla según las columnas visibles (null = todos)
+function listFields() {
+    // La completitud se calcula con todos los campos
+    if (visibleColumns.completitud) return null;
+    
+    const fields = new Set(['id', 'titulo_original', 'titulo_espanol', 'seleccionado', 'documentos']);
+    Object.entries(visibleColumns)
+        .filter(([column, visible]) => visible && column !== 'completitud')
+        .forEach(([column]) => fields.add(column));
+    return [...fields];
+}
+
+// Vuelve a la primera página; necesario cuando cambian los filtros o el tamaño de página
+export function resetPagination() {
+    pageCursors.clear();
+    setCurrentPage(1);
+}
+
 // Funciones para manejar el estado de carga del botón
 export function setImportButtonLoading(loading) {
     const button = document.getElementById('importButton');
@@ -32,16 +63,87 @@ export async function loadFieldMetadata() {
     }
 }
 
+// Carga solo la página visible: filtros, orden y paginación los resuelve /api/articles
 export async function loadArticles() {
+    const params = new URLSearchParams({ per_page: itemsPerPage, sort: 'id', order: 'asc' });
+    
+    const searchTerm = document.getElementById('searchInput')?.value.trim();
+    if (searchTerm) params.set('search', searchTerm);
+    
+    const selectionFilter = document.getElementById('selectionFilter')?.value;
+    if (selectionFilter === 'SEL:V') params.set('seleccionado', 'true');
+    if (selectionFilter === 'SEL:F') params.set('seleccionado', 'false');
+    
+    // Al avanzar página a página se usa el cursor de la anterior; al saltar, el número de página
+    const cursor = pageCursors.get(currentPage);
+    if (cursor !== undefined) {
+        params.set('cursor', cursor);
+    } else {
+        params.set('page', currentPage);
+    }
+    
+    const fields = listFields();
+    if (fields) params.set('fields', fields.join(','));
+    
     try {
-        const response = await fetch('/api/articles');
-        const articles = await response.json();
-        setAllArticles(articles);
+        // Revalidar con ETag: si nada cambió el servidor responde 304 y se reutiliza la copia local
+        const response = await fetch(`/api/articles?${params}`, { cache: 'no-cache' });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        const version = response.headers.get('X-Changes-Version');
+        changesVersion = version !== null ? parseInt(version) : null;
+        
+        if (data.next_cursor !== null) {
+            pageCursors.set(currentPage + 1, data.next_cursor);
+        }
+        setAllArticles(data.articles);
+        setFilteredArticles(data.articles);
+        setTotalArticles(data.total);
     } catch (error) {
         console.error('Error loading articles:', error);
     }
 }
 
+// Actualiza la página cargada con lo modificado desde su carga (p. ej. en otra pestaña
+// o por otro usuario). Los artículos editados se reemplazan en su lugar; si hubo altas
+// o bajas, o hay filtros que el cambio pudo afectar, se vuelve a pedir la página.
+export async function syncArticles() {
+    if (changesVersion === null) {
+        await loadArticles();
+        return;
+    }
+    
+    try {
+        const response = await fetch(`/api/articles/changes?since=${changesVersion}`, { cache: 'no-cache' });
+        if (!response.ok) {
+            // 410: la versión ya no está disponible
+            await loadArticles();
+            return;
+        }
+        const changes = await response.json();
+        
+        const onPage = changes.updated.filter(article => allArticles.some(a => a.id === article.id));
+        const filtered = Boolean(document.getElementById('searchInput')?.value.trim()
+            || document.getElementById('selectionFilter')?.value);
+        
+        if (changes.inserted.length || changes.deleted.length || (filtered && onPage.length)) {
+            await loadArticles();
+            return;
+        }
+        
+        changesVersion = changes.version;
+        onPage.forEach(article => {
+            const index = allArticles.findIndex(a => a.id === article.id);
+            allArticles[index] = article;
+            const filteredIndex = filteredArticles.findIndex(a => a.id === article.id);
+            if (filteredIndex !== -1) filteredArticles[filteredIndex] = article;
+        });
+    } catch (error) {
+        console.error('Error syncing articles:', error);
+        await loadArticles();
+    }
+}
+
 export async function checkCSV() {
     const fileInput = document.getElementById('csvFile');
     
@@ -63,6 +165,7 @@ export async function checkCSV() {
         });
 
         const data = await response.json();
+        importToken = data.import_token || null;
         
         if (data.status === 'duplicates_found') {
             setImportButtonLoading(false); // Desactivar carga antes de mostrar modal
@@ -92,27 +195,50 @@ export async function importCSV(forceImport = false) {
     // Activar estado de carga (por si se llama directamente desde el modal)
     setImportButtonLoading(true);
 
+    // Si el archivo ya fue validado, confirmar la importación con el token sin volver a subirlo
     const formData = new FormData();
-    formData.append('file', fileInput.files[0]);
+    if (importToken) {
+        formData.append('token', importToken);
+    } else {
+        formData.append('file', fileInput.files[0]);
+    }
     if (forceImport) {
         formData.append('force', 'true');
     }
+    // La importación corre en segundo plano en el servidor; aquí se consulta su avance
+    formData.append('async', 'true');
 
     try {
+        const usedToken = importToken;
+        importToken = null;
+        
         const response = await fetch('/api/import-csv', {
             method: 'POST',
             body: formData
         });
 
-        const data = await response.json();
+        // La sesión expiró: reintentar subiendo el archivo
+        if (response.status === 410 && usedToken) {
+            return await importCSV(forceImport);
+        }
+
+        let data = await response.json();
+        if (response.status === 202) {
+            const job = await waitForJob(data.job_id, job => {
+                showMessage(`Importando artículos... ${describeJobProgress(job)}`, 'info');
+            });
+            data = job.status === 'completed' ? job.result : { message: job.error };
+        }
         
         if (data.status === 'success') {
             showMessage(data.message, 'success');
-            await loadArticles();
-            setFilteredArticles([...allArticles].sort((a, b) => a.id - b.id));
+            await syncArticles();
             renderTable();
         } else {
-            showMessage(data.message, 'error');
+            // Una importación fallida se revierte y su sesión sigue disponible para reintentar
+            // (409: la sesión ya se importó o se está importando)
+            if (response.status !== 409) importToken = usedToken;
+            showMessage(data.message || data.error, 'error');
         }
     } catch (error) {
         console.error('Error importing CSV:', error);
@@ -127,9 +253,11 @@ export async function editArticle(id) {
     try {
         const response = await fetch(`/api/articles/${id}`);
         const article = await response.json();
+        editingArticle = article;
         
         // Calculate the article index in the current filtered view
         let articleIndex = filteredArticles.findIndex(a => a.id === parseInt(id));
+        if (articleIndex !== -1) articleIndex += (currentPage - 1) * itemsPerPage;
         articleIndex += 1
         
         // Update modal title with index
@@ -297,13 +425,27 @@ export async function saveArticle() {
         seleccionado: document.getElementById('seleccionado').checked
     };
 
+    // Enviar solo los campos modificados (PATCH) en lugar de reescribir toda la fila.
+    // Se compara con el artículo completo cargado al abrir el modal (la tabla puede
+    // tener solo algunas columnas)
+    const currentArticle = editingArticle && editingArticle.id === parseInt(id) ? editingArticle : null;
+    const changes = currentArticle
+        ? Object.fromEntries(Object.entries(data).filter(([key, value]) => (currentArticle[key] ?? '') !== (value ?? '')))
+        : data;
+
+    if (currentArticle && Object.keys(changes).length === 0) {
+        showMessage('Artículo actualizado correctamente', 'success');
+        closeModal();
+        return;
+    }
+
     try {
         const response = await fetch(`/api/articles/${id}`, {
-            method: 'PUT',
+            method: 'PATCH',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify(data)
+            body: JSON.stringify(changes)
         });
 
         if (response.ok) {
@@ -366,14 +508,11 @@ export async function handleToggleSelection(id) {
         
         // Enviar la actualización al servidor
         const response = await fetch(`/api/articles/${id}`, {
-            method: 'PUT',
+            method: 'PATCH',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                ...article,
-                seleccionado: newSelectionState
-            })
+            body: JSON.stringify({ seleccionado: newSelectionState })
         });
 
         if (response.ok) {
@@ -459,46 +598,91 @@ function updateToggleButtonState(id, isSelected) {
     }
 }
 
-export function exportExcelAll() {
-    // Cerrar dropdown
-    document.getElementById('exportDropdown').classList.add('hidden');
-    
-    // Mostrar mensaje de procesamiento
-    showMessage('Generando archivo Excel con todos los artículos...', 'info');
+// Texto de avance de un trabajo: porcentaje, filas por segundo y tiempo restante
+function describeJobProgress(job) {
+    const parts = [];
+    if (job.progress !== null) parts.push(`${job.progress}%`);
+    if (job.rows_per_second) parts.push(`${Math.round(job.rows_per_second).toLocaleString()} filas/s`);
+    if (job.eta_seconds !== null) parts.push(`faltan ${Math.ceil(job.eta_seconds)} s`);
+    return parts.join(' · ');
+}
+
+// Espera a que el trabajo termine recibiendo su avance por /api/jobs/<id>/events;
+// onProgress recibe cada estado. Sin EventSource se consulta /api/jobs/<id>
+function waitForJob(jobId, onProgress) {
+    if (!window.EventSource) {
+        return pollJob(jobId, onProgress);
+    }
     
-    fetch('/api/export-excel')
-        .then(response => {
-            if (!response.ok) throw new Error('Error en la descarga');
-            return response.blob();
-        })
-        .then(blob => {
-            downloadExcelFile(blob, 'matriz-analisis-todos');
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            showMessage('Error al generar el archivo Excel', 'error');
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/jobs/${jobId}/events`);
+        
+        source.addEventListener('progress', event => {
+            if (onProgress) onProgress(JSON.parse(event.data));
+        });
+        source.addEventListener('done', event => {
+            source.close();
+            resolve(JSON.parse(event.data));
         });
+        // El servidor cierra cada stream tras un tiempo y EventSource se reconecta;
+        // solo se abandona si la conexión quedó cerrada definitivamente
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) {
+                reject(new Error('Error al consultar el trabajo'));
+            }
+        };
+    });
 }
 
-export function exportExcelBookmarks() {
+async function pollJob(jobId, onProgress, interval = 1000) {
+    while (true) {
+        const response = await fetch(`/api/jobs/${jobId}`, { cache: 'no-store' });
+        if (!response.ok) throw new Error('Error al consultar el trabajo');
+        
+        const job = await response.json();
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job;
+        }
+        if (onProgress) onProgress(job);
+        
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+}
+
+// Genera la exportación como trabajo en segundo plano y descarga el archivo al terminar
+async function exportExcelJob(url, description, baseName) {
     // Cerrar dropdown
     document.getElementById('exportDropdown').classList.add('hidden');
     
     // Mostrar mensaje de procesamiento
-    showMessage('Generando archivo Excel con marcadores...', 'info');
+    showMessage(`Generando archivo Excel con ${description}...`, 'info');
     
-    fetch('/api/export-excel-bookmarks')
-        .then(response => {
-            if (!response.ok) throw new Error('Error en la descarga');
-            return response.blob();
-        })
-        .then(blob => {
-            downloadExcelFile(blob, 'matriz-analisis-marcadores');
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            showMessage('Error al generar el archivo Excel', 'error');
+    try {
+        const response = await fetch(`${url}?async=true`);
+        if (response.status !== 202) throw new Error('Error en la descarga');
+        
+        const queued = await response.json();
+        const job = await waitForJob(queued.job_id, job => {
+            showMessage(`Generando archivo Excel con ${description}... ${describeJobProgress(job)}`, 'info');
         });
+        if (job.status !== 'completed') throw new Error(job.error);
+        
+        const result = await fetch(`/api/jobs/${job.job_id}/result`);
+        if (!result.ok) throw new Error('Error en la descarga');
+        
+        downloadExcelFile(await result.blob(), baseName);
+    } catch (error) {
+        console.error('Error:', error);
+        showMessage('Error al generar el archivo Excel', 'error');
+    }
+}
+
+export function exportExcelAll() {
+    return exportExcelJob('/api/export-excel', 'todos los artículos', 'matriz-analisis-todos');
+}
+
+export function exportExcelBookmarks() {
+    return exportExcelJob('/api/export-excel-bookmarks', 'marcadores', 'matriz-analisis-marcadores');
 }
 
 export async function uploadDocument(sectionId, articleId, docType) {
@@ -516,33 +700,88 @@ export async function uploadDocument(sectionId, articleId, docType) {
         return;
     }
     
-    if (file.size > 16 * 1024 * 1024) {
-        alert('El archivo es demasiado grande. Máximo 16MB.');
-        return;
+    try {
+        await uploadDocumentInChunks(file, articleId, docType);
+        showModalMessage('Documento subido correctamente', 'success');
+        // Refresh article data in modal and update table
+        await refreshArticleInModal(articleId);
+    } catch (error) {
+        console.error('Error uploading document:', error);
+        showModalMessage(error.message || 'Error al subir el documento', 'error');
+    }
+}
+
+// SHA-256 del archivo para que el servidor reconozca contenido ya guardado.
+// crypto.subtle necesita el archivo completo en memoria: se omite en archivos grandes
+async function fileSha256(file, maxSize = 64 * 1024 * 1024) {
+    if (!window.crypto || !window.crypto.subtle || file.size > maxSize) {
+        return null;
+    }
+    try {
+        const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(byte => byte.toString(16).padStart(2, '0')).join('');
+    } catch (error) {
+        return null;
+    }
+}
+
+// Sube el PDF por partes; si una parte falla se consulta cuánto recibió el servidor y se continúa desde ahí
+async function uploadDocumentInChunks(file, articleId, docType, maxRetries = 3) {
+    let response = await fetch(`/api/articles/${articleId}/documents/uploads`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ filename: file.name, size: file.size, doc_type: docType, sha256: await fileSha256(file) })
+    });
+    const upload = await response.json();
+    if (!response.ok) {
+        throw new Error(upload.error || 'Error al iniciar la subida');
     }
     
-    const formData = new FormData();
-    formData.append('file', file);
-    formData.append('doc_type', docType);
+    // El servidor ya tenía este contenido: no hace falta subirlo
+    if (upload.completed) {
+        return upload;
+    }
     
-    try {
-        const response = await fetch(`/api/articles/${articleId}/documents`, {
-            method: 'POST',
-            body: formData
-        });
-        
-        if (response.ok) {
-            showModalMessage('Documento subido correctamente', 'success');
-            // Refresh article data in modal and update table
-            await refreshArticleInModal(articleId);
-        } else {
-            const error = await response.json();
-            showModalMessage(error.error || 'Error al subir el documento', 'error');
+    let offset = upload.offset;
+    let retries = 0;
+    while (offset < file.size) {
+        try {
+            response = await fetch(`/api/documents/uploads/${upload.upload_id}?offset=${offset}`, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                },
+                body: file.slice(offset, offset + upload.chunk_size)
+            });
+            const data = await response.json();
+            
+            // 409: el servidor indica desde qué offset continuar
+            if (response.ok || (response.status === 409 && data.offset !== undefined)) {
+                offset = data.offset;
+                retries = 0;
+                continue;
+            }
+            throw new Error(data.error || 'Error al subir el documento');
+        } catch (error) {
+            if (++retries > maxRetries) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+            const statusResponse = await fetch(`/api/documents/uploads/${upload.upload_id}`);
+            if (statusResponse.ok) {
+                offset = (await statusResponse.json()).offset;
+            }
         }
-    } catch (error) {
-        console.error('Error uploading document:', error);
-        showModalMessage('Error al subir el documento', 'error');
     }
+    
+    response = await fetch(`/api/documents/uploads/${upload.upload_id}/finalize`, { method: 'POST' });
+    const result = await response.json();
+    if (!response.ok) {
+        throw new Error(result.error || 'Error al subir el documento');
+    }
+    return result;
 }
 
 export async function deleteDocument(articleId, docType) {
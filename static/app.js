@@ -1,5 +1,5 @@
 import { setAllArticles, setFilteredArticles, allArticles } from './config.js';
-import { loadFieldMetadata, loadArticles, checkCSV, importCSV, editArticle, saveArticle, handleToggleSelection, exportExcelAll, exportExcelBookmarks, uploadDocument, deleteDocument, refreshArticleInModal, setImportButtonLoading } from './api.js';
+import { loadFieldMetadata, loadArticles, syncArticles, checkCSV, importCSV, editArticle, saveArticle, handleToggleSelection, exportExcelAll, exportExcelBookmarks, uploadDocument, deleteDocument, refreshArticleInModal, setImportButtonLoading } from './api.js';
 import { renderTable, goToPage, changeItemsPerPage, filterArticles, updateColumns, toggleColumnSettings, toggleExportDropdown, downloadExcelFile, exportExcel } from './table.js';
 import { viewDocument, openDocumentSidebar, createDocumentSidebar, closeDocumentSidebar, openInNewTab, toggleFullscreen, getDocumentByType, renderDocumentSections, renderDocumentSection, showUploadForm, cancelUpload } from './documents.js';
 import { showDuplicateConfirmation, closeConfirmModal, proceedWithImport, forceImport, closeModal, showMessage, showModalMessage, clearModalMessage, showInstructionsMessage, openInstructionsModal, generateInstructionsPrompt, generateInstructionsPromptJSON, regenerateInstructions, regenerateInstructionsJSON, copyInstructions, copyInstructionsJSON, validateAndApplyJSON, closeInstructionsModal, loadColumnMetadata, removeSyntaxFromFields } from './modals.js';
@@ -13,15 +13,18 @@ document.addEventListener('DOMContentLoaded', function() {
     if (selectionFilter) {
         selectionFilter.value = 'SEL:V';
     }
-    loadArticles().then(() => {
-        setFilteredArticles([...allArticles].sort((a, b) => a.id - b.id));
-        renderTable();
-        // Aplicar el filtro después de cargar
-        filterArticles();
-    });
+    // updateColumns carga la primera página con el filtro y las columnas elegidas
     updateColumns();
 });
 
+// Al volver a la pestaña, traer solo lo que cambió mientras tanto
+document.addEventListener('visibilitychange', async function() {
+    if (document.visibilityState === 'visible') {
+        await syncArticles();
+        renderTable();
+    }
+});
+
 // Cerrar dropdown cuando se hace clic fuera
 document.addEventListener('click', function(event) {
     const dropdown = document.getElementById('exportDropdown');
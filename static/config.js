@@ -1,6 +1,7 @@
 // Global variables
 export let allArticles = [];
 export let filteredArticles = [];
+export let totalArticles = 0; // Total filtrado en el servidor (la tabla solo tiene la página visible)
 export let currentPage = 1;
 export let itemsPerPage = 10;
 export let readonlyFields = []; // Fields that are read-only (imported from Scopus)
@@ -51,6 +52,10 @@ export function setFilteredArticles(articles) {
     filteredArticles = articles;
 }
 
+export function setTotalArticles(total) {
+    totalArticles = total;
+}
+
 export function setCurrentPage(page) {
     currentPage = page;
 }
@@ -1,3 +1,5 @@
+import { allArticles } from './config.js';
+
 export function viewDocument(filename, alternateFilename, rowNumber, articleTitle, event) {
     if (event) {
         event.preventDefault();
@@ -44,7 +46,7 @@ export function openDocumentSidebar(url, filename, alternateFilename, rowNumber,
         toggleButton.style.display = 'block';
         toggleButton.onclick = () => switchDocument(alternateFilename, filename, rowNumber, articleTitle);
         
-        const isSpanish = filename.includes('-SPANISH');
+        const isSpanish = isSpanishDocument(filename);
         toggleButton.innerHTML = isSpanish 
             ? '<i class="fas fa-language"></i> EN'
             : '<i class="fas fa-language"></i> ES';
@@ -289,6 +291,13 @@ export async function cancelUpload(sectionId, articleId, docType) {
     renderDocumentSection(sectionId, article, docType);
 }
 
+// Los archivos guardados por contenido (<sha256>.pdf) no llevan el sufijo -SPANISH:
+// el idioma se toma del documento traducido registrado en el artículo
+function isSpanishDocument(filename) {
+    return filename.includes('-SPANISH') ||
+        allArticles.some(article => (article.documentos || []).some(doc => doc.nombre_archivo_traducido === filename));
+}
+
 function switchDocument(newFilename, alternateFilename, rowNumber, articleTitle) {
     const url = `/api/documents/${newFilename}`;
     const sidebar = document.getElementById('documentSidebar');
@@ -301,7 +310,7 @@ function switchDocument(newFilename, alternateFilename, rowNumber, articleTitle)
     
     toggleButton.onclick = () => switchDocument(alternateFilename, newFilename, rowNumber, articleTitle);
     
-    const isSpanish = newFilename.includes('-SPANISH');
+    const isSpanish = isSpanishDocument(newFilename);
     toggleButton.innerHTML = isSpanish 
         ? '<i class="fas fa-language"></i> EN'
         : '<i class="fas fa-language"></i> ES';
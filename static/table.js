@@ -1,5 +1,9 @@
-import { allArticles, filteredArticles, currentPage, itemsPerPage, visibleColumns, setFilteredArticles, setCurrentPage, setItemsPerPage, setVisibleColumns } from './config.js';
-import { loadArticles } from './api.js';
+import { filteredArticles, totalArticles, currentPage, itemsPerPage, visibleColumns, setCurrentPage, setItemsPerPage, setVisibleColumns } from './config.js';
+import { loadArticles, resetPagination } from './api.js';
+
+// Espera tras la última tecla antes de pedir la búsqueda al servidor
+const SEARCH_DEBOUNCE_MS = 300;
+let searchTimer = null;
 
 export function renderTable() {
     renderTableHeader();
@@ -54,9 +58,9 @@ export function renderTableHeader() {
 
 export function renderTableBody() {
     const tbody = document.getElementById('articlesTable');
+    // filteredArticles ya es la página visible que devolvió el servidor
     const startIndex = (currentPage - 1) * itemsPerPage;
-    const endIndex = startIndex + itemsPerPage;
-    const pageArticles = filteredArticles.slice(startIndex, endIndex);
+    const pageArticles = filteredArticles;
 
     tbody.innerHTML = pageArticles.map((article, index) => {
         const cells = [];
@@ -162,13 +166,13 @@ export function renderTableBody() {
 }
 
 export function renderPagination() {
-    const totalPages = Math.ceil(filteredArticles.length / itemsPerPage);
-    const startItem = (currentPage - 1) * itemsPerPage + 1;
-    const endItem = Math.min(currentPage * itemsPerPage, filteredArticles.length);
+    const totalPages = Math.ceil(totalArticles / itemsPerPage);
+    const startItem = totalArticles === 0 ? 0 : (currentPage - 1) * itemsPerPage + 1;
+    const endItem = Math.min((currentPage - 1) * itemsPerPage + filteredArticles.length, totalArticles);
 
     // Pagination info
     document.getElementById('paginationInfo').textContent = 
-        `Mostrando ${startItem}-${endItem} de ${filteredArticles.length} artículos`;
+        `Mostrando ${startItem}-${endItem} de ${totalArticles} artículos`;
 
     // Pagination controls
     const controls = document.getElementById('paginationControls');
@@ -193,37 +197,27 @@ export function renderPagination() {
     controls.innerHTML = buttons.join('');
 }
 
-export function goToPage(page) {
+export async function goToPage(page) {
     setCurrentPage(page);
+    await loadArticles();
     renderTable();
 }
 
-export function changeItemsPerPage() {
+export async function changeItemsPerPage() {
     setItemsPerPage(parseInt(document.getElementById('itemsPerPage').value));
-    setCurrentPage(1);
+    resetPagination();
+    await loadArticles();
     renderTable();
 }
 
+// La búsqueda y el filtro de selección se aplican en el servidor (/api/articles)
 export function filterArticles() {
-    const searchTerm = document.getElementById('searchInput').value.toLowerCase();
-    const selectionFilter = document.getElementById('selectionFilter').value;
-    
-    const filtered = allArticles.filter(article => {
-        const matchesSearch = !searchTerm || 
-            (article.titulo_original && article.titulo_original.toLowerCase().includes(searchTerm)) ||
-            (article.titulo_espanol && article.titulo_espanol.toLowerCase().includes(searchTerm)) ||
-            (article.autor && article.autor.toLowerCase().includes(searchTerm));
-        
-        const matchesSelection = !selectionFilter || 
-            (selectionFilter === 'SEL:V' && article.seleccionado) ||
-            (selectionFilter === 'SEL:F' && !article.seleccionado);
-        
-        return matchesSearch && matchesSelection;
-    }).sort((a, b) => a.id - b.id);
-    
-    setFilteredArticles(filtered);
-    setCurrentPage(1);
-    renderTable();
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(async () => {
+        resetPagination();
+        await loadArticles();
+        renderTable();
+    }, SEARCH_DEBOUNCE_MS);
 }
 
 export function updateColumns() {
@@ -263,7 +257,8 @@ export function updateColumns() {
         seleccionado: document.getElementById('col-seleccionado').checked
     };
     setVisibleColumns(newVisibleColumns);
-    renderTable();
+    // La página se pide solo con las columnas visibles: volver a cargarla
+    loadArticles().then(renderTable);
 }
 
 export function toggleColumnSettings() {